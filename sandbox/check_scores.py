@@ -1,6 +1,11 @@
 import pandas as pd
 
-df = pd.read_csv('outputs/scores.csv')
+# Sorted (date, index) MultiIndex: each lookup below is a binary search, not a full-column scan.
+df = (
+    pd.read_csv('outputs/scores.csv', engine='pyarrow', parse_dates=['date'])
+    .set_index(['date', 'index'])
+    .sort_index()
+)
 
 print('=== z_window configuration ===')
 print('Nifty 50:  252 days (full)')
@@ -9,9 +14,11 @@ print('Smallcap:  160 days (reduced, same as midcap)')
 print()
 
 print('=== Latest scores (2026-01-29) ===')
-latest = df[df['date'] == '2026-01-29'].sort_values('index')
+try:
+    latest = df.loc[pd.Timestamp('2026-01-29')]
+except KeyError:
+    latest = df.iloc[0:0].droplevel('date')
 for idx in ['nifty50', 'midcap100', 'smallcap100']:
-    row = latest[latest['index'] == idx]
-    if len(row) > 0:
-        r = row.iloc[0]
-        print(f'{idx:12s}: trend_score={r["trend_score"]:6.2f}, score={r["score"]:6.2f}, label={r["label"]}')
+    if idx in latest.index:
+        row = latest.loc[idx]
+        print(f'{idx:12s}: trend_score={row.trend_score:6.2f}, score={row.score:6.2f}, label={row.label}')
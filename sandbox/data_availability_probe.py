@@ -12,6 +12,7 @@ This DOES NOT change any cached files; it just reuses whatever
 `trend_analyzer.data_loader` has already downloaded.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List
 import sys
@@ -24,7 +25,12 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from trend_analyzer.config import AppConfig
-from trend_analyzer.data_loader import load_or_download_series
+from trend_analyzer.data_loader import (
+    CacheCategory,
+    clear_load_cache,
+    load_or_download_many,
+    load_or_download_series,
+)
 
 
 def _as_candidates(v: Any) -> List[str]:
@@ -37,38 +43,94 @@ def _as_candidates(v: Any) -> List[str]:
     return []
 
 
-def _try_first_candidate(
-    *,
+def _category_for(logical_name: str) -> CacheCategory:
+    """Cache TTL category from the logical-name prefix (eq_/y_/ro_)."""
+    if logical_name.startswith("eq_"):
+        return "equity"
+    if logical_name.startswith("y_"):
+        return "yield"
+    if logical_name == "ro_vix":
+        return "vix"
+    # Remaining risk-off assets (FX, gold/silver futures) share the daily FX TTL.
+    return "fx"
+
+
+def _safe_load(
+    ticker: str,
     logical_name: str,
-    candidates: List[str],
+    errors: List[Exception],
+    *,
     cache_dir: Path,
     start: str | None,
     end: str | None,
     refresh: bool,
-) -> tuple[pd.Series | None, str | None, Exception | None]:
+    prefetched: Dict[str, pd.Series] | None,
+) -> pd.Series | None:
     """
-    Try each candidate ticker until one returns a non-empty series.
-    Returns (series_or_none, chosen_ticker_or_none, last_error_or_none).
+    Load one candidate and drop its NaNs (once; the caller reuses the cleaned series).
+    Returns None if it is empty; exceptions are appended to `errors` instead of raised.
     """
-    last_err: Exception | None = None
-    for t in candidates:
-        try:
+    try:
+        if prefetched is not None and ticker in prefetched:
+            s = prefetched[ticker].rename(logical_name)
+        else:
             s = load_or_download_series(
-                ticker=t,
+                ticker=ticker,
                 cache_dir=cache_dir,
                 start=start,
                 end=end,
                 refresh=refresh,
+                category=_category_for(logical_name),
             ).rename(logical_name)
-            if s is not None and not s.dropna().empty:
-                return s, t, None
-        except Exception as e:  # noqa: BLE001 - diagnostic helper
-            last_err = e
+    except Exception as e:  # noqa: BLE001 - diagnostic helper
+        errors.append(e)
+        return None
+    if s is None:
+        return None
+    s_cleaned = s.loc[~s.isna()]
+    return None if s_cleaned.empty else s_cleaned
+
+
+def _try_first_candidate(
+    *,
+    logical_name: str,
+    candidates: List[str],
+    cache_dir: Path,
+    start: str | None,
+    end: str | None,
+    refresh: bool,
+    prefetched: Dict[str, pd.Series] | None = None,
+) -> tuple[pd.Series | None, str | None, Exception | None]:
+    """
+    Try each candidate ticker until one returns a non-empty series.
+    Candidates already present in `prefetched` (batched first pass) are not loaded again. The
+    first candidate was part of that batch, so if it is missing it is recorded as an error
+    rather than retried.
+    Returns (nan_free_series_or_none, chosen_ticker_or_none, last_error_or_none).
+    """
+    errors: List[Exception] = []
+    for i, t in enumerate(candidates):
+        if i == 0 and prefetched is not None and t not in prefetched:
+            errors.append(RuntimeError(f"'{t}' was not returned by the batched download"))
             continue
-    return None, None, last_err
+        s = _safe_load(
+            t,
+            logical_name,
+            errors,
+            cache_dir=cache_dir,
+            start=start,
+            end=end,
+            refresh=refresh,
+            prefetched=prefetched,
+        )
+        if s is not None:
+            return s, t, None
+    return None, None, (errors[-1] if errors else None)
 
 
 def main() -> int:
+    # Start from an empty in-process memo so results reflect the cache as it is on disk now.
+    clear_load_cache()
     cfg = AppConfig.load("config.yaml")
 
     cache_dir = Path(cfg.get("data", "cache_dir", default="data/cache"))
@@ -80,6 +142,8 @@ def main() -> int:
     yld_cfg: Dict[str, Any] = cfg.get("tickers", "yields", default={}) or {}
 
     today = pd.Timestamp.today().normalize()
+    # Day ordinal of today, hoisted out of the per-series loop (lag = integer day difference).
+    today_ordinal = today.to_period("D").ordinal
     print(f"Today (local system date): {today.date().isoformat()}")
     print(f"Data start from config:   {start!r}")
     print(f"Data end from config:     {end!r}  (None = up to latest available)")
@@ -105,67 +169,86 @@ def main() -> int:
         print(f"  {lname}: {cands}")
     print()
 
-    rows: list[dict[str, Any]] = []
+    # First pass: batch-load the first candidate of every logical series in one request.
+    # Logical names whose first candidate comes back empty fall back serially below.
+    first_candidates = {
+        cands[0]: _category_for(lname) for lname, cands in logical_to_candidates.items() if cands
+    }
+    prefetched: Dict[str, pd.Series] | None
+    try:
+        prefetched = load_or_download_many(
+            list(first_candidates),
+            cache_dir=cache_dir,
+            start=start,
+            end=end,
+            refresh=False,
+            categories=first_candidates,
+        )
+    except Exception as e:  # noqa: BLE001 - diagnostic helper
+        print(f"Batched load failed ({e}); falling back to per-ticker loads.")
+        prefetched = None
 
-    for lname, cands in logical_to_candidates.items():
+    def _resolve(item: tuple[str, List[str]]) -> tuple[pd.Series | None, str | None, Exception | None]:
+        lname, cands = item
         if not cands:
-            rows.append(
-                {
-                    "logical_name": lname,
-                    "chosen_ticker": "",
-                    "status": "NO_CANDIDATES",
-                    "first_date": "",
-                    "last_date": "",
-                    "days_lag_vs_today": "",
-                    "n_points": "",
-                    "note": "",
-                }
-            )
-            continue
-
-        s, chosen, err = _try_first_candidate(
+            return None, None, None
+        return _try_first_candidate(
             logical_name=lname,
             candidates=cands,
             cache_dir=cache_dir,
             start=start,
             end=end,
             refresh=False,  # IMPORTANT: only use existing cache; do not hit network here.
+            prefetched=prefetched,
         )
 
-        if s is None or s.dropna().empty:
-            rows.append(
-                {
-                    "logical_name": lname,
-                    "chosen_ticker": chosen or "",
-                    "status": "EMPTY_OR_MISSING",
-                    "first_date": "",
-                    "last_date": "",
-                    "days_lag_vs_today": "",
-                    "n_points": "",
-                    "note": str(err) if err is not None else "no non-empty series in cache",
-                }
-            )
+    # Fallback loads are network/disk bound, so resolve logical names concurrently.
+    items = list(logical_to_candidates.items())
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(_resolve, items))
+
+    rows: list[tuple[Any, ...]] = []
+
+    for (lname, cands), (s, chosen, err) in zip(items, results):
+        if not cands:
+            rows.append((lname, "", "NO_CANDIDATES", "", "", "", "", ""))
             continue
 
-        s = s.dropna()
-        first = s.index.min()
-        last = s.index.max()
-        lag = (today - last.normalize()).days
+        if s is None:
+            note = str(err) if err is not None else "no non-empty series in cache"
+            rows.append((lname, chosen or "", "EMPTY_OR_MISSING", "", "", "", "", note))
+            continue
+
+        # Cached series are sorted and NaN-free here, so the endpoints are the date range.
+        dates = s.index.values
+        first = pd.Timestamp(dates[0])
+        last = pd.Timestamp(dates[-1])
+        lag = today_ordinal - last.to_period("D").ordinal
 
         rows.append(
-            {
-                "logical_name": lname,
-                "chosen_ticker": chosen or "",
-                "status": "OK",
-                "first_date": first.date().isoformat() if isinstance(first, pd.Timestamp) else str(first),
-                "last_date": last.date().isoformat() if isinstance(last, pd.Timestamp) else str(last),
-                "days_lag_vs_today": lag,
-                "n_points": int(s.shape[0]),
-                "note": "",
-            }
+            (
+                lname,
+                chosen or "",
+                "OK",
+                first.date().isoformat(),
+                last.date().isoformat(),
+                lag,
+                int(s.shape[0]),
+                "",
+            )
         )
 
-    df = pd.DataFrame(rows).sort_values(["logical_name"])
+    columns = [
+        "logical_name",
+        "chosen_ticker",
+        "status",
+        "first_date",
+        "last_date",
+        "days_lag_vs_today",
+        "n_points",
+        "note",
+    ]
+    df = pd.DataFrame(rows, columns=columns).sort_values(["logical_name"])
     print("DATA AVAILABILITY (from current cache):")
     print(df.to_string(index=False))
 
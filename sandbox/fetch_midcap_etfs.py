@@ -23,26 +23,34 @@ def main():
 
     print("Fetching last 5 trading days for each Midcap 150 ETF...\n")
     working = []
+    # One batched request for all ETFs instead of one round-trip per ticker.
+    try:
+        df = yf.download(
+            " ".join(t for t, _ in ETFS),
+            start="2026-01-01",
+            end="2026-01-30",
+            interval="1d",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+            group_by="ticker",
+        )
+    except Exception as e:
+        print(f"  FAIL batch download  {e}")
+        df = None
+
     for ticker, er in ETFS:
-        try:
-            df = yf.download(
-                ticker,
-                start="2026-01-01",
-                end="2026-01-30",
-                interval="1d",
-                auto_adjust=True,
-                progress=False,
-                threads=False,
-            )
-            if df is not None and not df.empty:
-                n = len(df)
-                last = df.index.max()
-                working.append((ticker, er, n, last))
-                print(f"  OK  {ticker}  (ER {er}%)  rows={n}  last={last.date()}")
-            else:
-                print(f"  --  {ticker}  (ER {er}%)  no data")
-        except Exception as e:
-            print(f"  FAIL {ticker}  (ER {er}%)  {e}")
+        if df is None or df.empty or ticker not in df.columns.get_level_values(0):
+            print(f"  --  {ticker}  (ER {er}%)  no data")
+            continue
+        tdf = df[ticker].dropna(how="all")
+        if not tdf.empty:
+            n = len(tdf)
+            last = tdf.index.max()
+            working.append((ticker, er, n, last))
+            print(f"  OK  {ticker}  (ER {er}%)  rows={n}  last={last.date()}")
+        else:
+            print(f"  --  {ticker}  (ER {er}%)  no data")
 
     if working:
         # Prefer lowest expense ratio
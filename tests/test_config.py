@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from trend_analyzer.config import AppConfig, _load_yaml_cached
+
+
+def test_load_is_memoized_and_reloads_on_change(tmp_path):
+    p = tmp_path / "config.yaml"
+    p.write_text("data:\n  start: '2015-01-01'\n", encoding="utf-8")
+
+    cfg = AppConfig.load(p)
+    hits = _load_yaml_cached.cache_info().hits
+    assert AppConfig.load(str(p)) == cfg
+    assert _load_yaml_cached.cache_info().hits == hits + 1
+    assert cfg.get("data", "start") == "2015-01-01"
+
+    # Each load is independent of what earlier callers did to theirs.
+    cfg.raw["data"]["start"] = "mutated"
+    assert AppConfig.load(p).get("data", "start") == "2015-01-01"
+
+    p.write_text("data:\n  start: '2020-01-01'\n", encoding="utf-8")
+    st = os.stat(p)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    reloaded = AppConfig.load(p)
+    assert reloaded.get("data", "start") == "2020-01-01"
+
+
+def test_load_rejects_non_mapping(tmp_path):
+    p = tmp_path / "config.yaml"
+    p.write_text("- a\n- b\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        AppConfig.load(p)
@@ -0,0 +1,49 @@
+import importlib.util
+from pathlib import Path
+
+import pandas as pd
+
+_PROBE_PATH = Path(__file__).resolve().parents[1] / "sandbox" / "data_availability_probe.py"
+_spec = importlib.util.spec_from_file_location("data_availability_probe", _PROBE_PATH)
+probe = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(probe)
+
+
+def test_try_first_candidate_reports_prefetched_miss(monkeypatch, tmp_path):
+    calls: list[str] = []
+
+    def fake_loader(*, ticker, **kwargs):
+        calls.append(ticker)
+        raise AssertionError("a batched first candidate must not be reloaded")
+
+    monkeypatch.setattr(probe, "load_or_download_series", fake_loader)
+
+    s, chosen, err = probe._try_first_candidate(
+        logical_name="ro_gold",
+        candidates=["GC=F"],
+        cache_dir=tmp_path,
+        start=None,
+        end=None,
+        refresh=False,
+        prefetched={"OTHER": pd.Series([1.0])},
+    )
+    assert s is None and chosen is None
+    assert "not returned by the batched download" in str(err)
+    assert calls == []
+
+
+def test_try_first_candidate_falls_back_after_prefetched_miss(monkeypatch, tmp_path):
+    good = pd.Series([1.0, 2.0], index=pd.date_range("2024-01-01", periods=2, freq="B"))
+    monkeypatch.setattr(probe, "load_or_download_series", lambda *, ticker, **kwargs: good)
+
+    s, chosen, err = probe._try_first_candidate(
+        logical_name="eq_midcap100",
+        candidates=["MISS", "FALLBACK"],
+        cache_dir=tmp_path,
+        start=None,
+        end=None,
+        refresh=False,
+        prefetched={},
+    )
+    assert chosen == "FALLBACK" and err is None
+    assert s.name == "eq_midcap100"
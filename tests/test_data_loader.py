@@ -1,11 +1,28 @@
+import json
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from trend_analyzer.data_loader import align_series, load_or_download_series
+from trend_analyzer.data_loader import (
+    align_series,
+    clear_load_cache,
+    download_daily_adj_close,
+    load_or_download_many,
+    load_or_download_series,
+)
+
+
+def _assert_values(result: pd.Series, expected: dict[str, float]) -> None:
+    """Compare `result` at the given dates in one vectorized check."""
+    exp = pd.Series(expected, dtype="float64")
+    exp.index = pd.DatetimeIndex(exp.index)
+    pd.testing.assert_series_equal(
+        result.reindex(exp.index), exp, check_names=False, check_index_type=False, check_freq=False
+    )
 
 
 def test_align_series_forward_fill_limit():
@@ -25,6 +42,16 @@ def test_align_series_forward_fill_limit():
     assert pd.isna(df.loc[idx[3], "b"])
 
 
+def test_download_single_ticker_from_generator_names_column():
+    idx = pd.date_range("2026-01-20", periods=3, freq="B")
+    raw = pd.DataFrame({"Close": [1.0, 2.0, 3.0], "Volume": [10, 20, 30]}, index=idx)
+    with patch("trend_analyzer.data_loader.yf.download", return_value=raw) as mock_download:
+        close = download_daily_adj_close((t for t in ["ONE"]), start=None, end=None)
+    assert mock_download.call_args.kwargs["tickers"] == ["ONE"]
+    assert list(close.columns) == ["ONE"]
+    assert close["ONE"].tolist() == [1.0, 2.0, 3.0]
+
+
 def test_load_or_download_series_incremental_fetch():
     """Test that incremental fetching works: cache + new data merged correctly."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -32,12 +59,12 @@ def test_load_or_download_series_incremental_fetch():
         ticker = "TEST"
 
         # Create initial cache with data up to 2026-01-23
-        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
         cache_data = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # Mock yfinance to return new data from 2026-01-24 to 2026-01-26
         new_dates = pd.date_range("2026-01-24", "2026-01-26", freq="D")
@@ -46,7 +73,7 @@ def test_load_or_download_series_incremental_fetch():
             index=new_dates,
         )
 
-        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=new_data):
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", new=lambda *args, **kwargs: new_data.copy()):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -59,32 +86,58 @@ def test_load_or_download_series_incremental_fetch():
         assert len(result) == 7
         assert result.index.min() == pd.Timestamp("2026-01-20")
         assert result.index.max() == pd.Timestamp("2026-01-26")
-        assert result.loc["2026-01-23"] == 103.0  # Last cached value
-        assert result.loc["2026-01-24"] == 104.0  # First new value
-        assert result.loc["2026-01-26"] == 106.0  # Last new value
+        # Last cached value, first new value, last new value
+        _assert_values(result, {"2026-01-23": 103.0, "2026-01-24": 104.0, "2026-01-26": 106.0})
 
         # Cache file should be updated with merged data
-        updated_cache = pd.read_csv(cache_path, parse_dates=["Date"]).set_index("Date")
+        updated_cache = pd.read_parquet(cache_path)
         assert len(updated_cache) == 7
         assert updated_cache.index.max() == pd.Timestamp("2026-01-26")
 
 
+def test_load_or_download_series_drops_duplicated_trailing_row():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        ticker = "TEST"
+
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
+        cache_df = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close").to_frame()
+        cache_df.index.name = "Date"
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
+
+        # New rows follow the cache, but the source repeats its last row.
+        new_dates = pd.DatetimeIndex(["2026-01-26", "2026-01-27", "2026-01-27"])
+        new_data = pd.DataFrame({"Close": [104.0, 105.0, 105.5]}, index=new_dates)
+
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", new=lambda *args, **kwargs: new_data.copy()):
+            result = load_or_download_series(ticker=ticker, cache_dir=cache_dir, start=None, end="2026-01-28")
+
+        assert result.index.is_unique
+        assert len(result) == 6
+        _assert_values(result, {"2026-01-27": 105.5})
+        assert pd.read_parquet(cache_path).index.is_unique
+
+
 def test_load_or_download_series_cache_only():
     """Test that when cache exists and covers requested range, no fetch happens."""
     with tempfile.TemporaryDirectory() as tmpdir:
         cache_dir = Path(tmpdir)
         ticker = "TEST"
 
-        # Create cache with data up to 2026-01-25
-        cache_dates = pd.date_range("2026-01-20", "2026-01-25", freq="D")
+        # Create cache with data up to 2026-01-27
+        cache_dates = pd.date_range("2026-01-20", "2026-01-27", freq="B")
         cache_data = pd.Series([100.0, 101.0, 102.0, 103.0, 104.0, 105.0], index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # Request data up to 2026-01-23 (before cache end)
-        with patch("trend_analyzer.data_loader.download_daily_adj_close") as mock_download:
+        with patch(
+            "trend_analyzer.data_loader.download_daily_adj_close",
+            side_effect=AssertionError("download should not be called"),
+        ):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -94,9 +147,37 @@ def test_load_or_download_series_cache_only():
             )
 
         # Should return cache without calling download
-        mock_download.assert_not_called()
         assert len(result) == 6  # All cached data
-        assert result.index.max() == pd.Timestamp("2026-01-25")
+        assert result.index.max() == pd.Timestamp("2026-01-27")
+
+
+def test_load_or_download_series_cache_covers_weekend_end():
+    """Test that a cache ending on Friday is fresh for a weekend end date (no fetch)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        ticker = "TEST"
+
+        # 2026-01-23 is a Friday; 2026-01-25 is a Sunday
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
+        cache_data = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close")
+        cache_df = cache_data.to_frame()
+        cache_df.index.name = "Date"
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
+
+        with patch(
+            "trend_analyzer.data_loader.download_daily_adj_close",
+            side_effect=AssertionError("download should not be called"),
+        ):
+            result = load_or_download_series(
+                ticker=ticker,
+                cache_dir=cache_dir,
+                start=None,
+                end="2026-01-25",
+                refresh=False,
+            )
+        assert len(result) == 4
+        assert result.index.max() == pd.Timestamp("2026-01-23")
 
 
 def test_load_or_download_series_refresh_flag():
@@ -106,12 +187,12 @@ def test_load_or_download_series_refresh_flag():
         ticker = "TEST"
 
         # Create old cache
-        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
         cache_data = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # Mock fresh download (different data)
         fresh_dates = pd.date_range("2026-01-20", "2026-01-27", freq="D")
@@ -120,7 +201,7 @@ def test_load_or_download_series_refresh_flag():
             index=fresh_dates,
         )
 
-        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=fresh_data):
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", new=lambda *args, **kwargs: fresh_data.copy()):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -131,7 +212,7 @@ def test_load_or_download_series_refresh_flag():
 
         # Should have fresh data, not cached
         assert len(result) == 8
-        assert result.loc["2026-01-20"] == 200.0  # Fresh value, not cached 100.0
+        _assert_values(result, {"2026-01-20": 200.0})  # Fresh value, not cached 100.0
         assert result.index.max() == pd.Timestamp("2026-01-27")
 
 
@@ -148,7 +229,7 @@ def test_load_or_download_series_no_cache_first_run():
             index=dates,
         )
 
-        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=data):
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", new=lambda *args, **kwargs: data.copy()):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -163,7 +244,7 @@ def test_load_or_download_series_no_cache_first_run():
         assert result.index.max() == pd.Timestamp("2026-01-25")
 
         # Cache should be created
-        cache_path = cache_dir / f"{ticker}.csv"
+        cache_path = cache_dir / f"{ticker}.parquet"
         assert cache_path.exists()
 
 
@@ -174,12 +255,12 @@ def test_load_or_download_series_no_new_data_available():
         ticker = "TEST"
 
         # Create cache
-        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
         cache_data = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # Mock yfinance returning empty (no new data available)
         with patch("trend_analyzer.data_loader.download_daily_adj_close", side_effect=RuntimeError("No data returned")):
@@ -194,7 +275,7 @@ def test_load_or_download_series_no_new_data_available():
         # Should return cached data
         assert len(result) == 4
         assert result.index.max() == pd.Timestamp("2026-01-23")
-        assert result.loc["2026-01-23"] == 103.0
+        _assert_values(result, {"2026-01-23": 103.0})
 
 
 def test_load_or_download_series_handles_overlap():
@@ -204,12 +285,12 @@ def test_load_or_download_series_handles_overlap():
         ticker = "TEST"
 
         # Cache has data up to 2026-01-23
-        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
         cache_data = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # New data overlaps: starts from 2026-01-23 (same as cache end) with different value
         new_dates = pd.date_range("2026-01-23", "2026-01-25", freq="D")
@@ -218,7 +299,7 @@ def test_load_or_download_series_handles_overlap():
             index=new_dates,
         )
 
-        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=new_data):
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", new=lambda *args, **kwargs: new_data.copy()):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -228,9 +309,8 @@ def test_load_or_download_series_handles_overlap():
             )
 
         # Overlapping date should use NEW value (keep="last" in merge)
-        assert result.loc["2026-01-23"] == 999.0  # New value, not cached 103.0
-        assert result.loc["2026-01-24"] == 104.0
-        assert result.loc["2026-01-25"] == 105.0
+        # 2026-01-23 is the new value, not cached 103.0
+        _assert_values(result, {"2026-01-23": 999.0, "2026-01-24": 104.0, "2026-01-25": 105.0})
 
 
 def test_load_or_download_series_cache_up_to_today():
@@ -241,15 +321,19 @@ def test_load_or_download_series_cache_up_to_today():
 
         # Create cache with data up to today
         today = pd.Timestamp.today().normalize()
-        cache_dates = pd.date_range(today - pd.Timedelta(days=5), today, freq="D")
+        # Trading days only: on a weekend the cache ends on Friday and is still fresh.
+        cache_dates = pd.bdate_range(end=today, periods=6)
         cache_data = pd.Series(range(100, 100 + len(cache_dates)), index=cache_dates, name="Close")
         cache_df = cache_data.to_frame()
         cache_df.index.name = "Date"
-        cache_path = cache_dir / f"{ticker}.csv"
-        cache_df.to_csv(cache_path, index=True)
+        cache_path = cache_dir / f"{ticker}.parquet"
+        cache_df.to_parquet(cache_path)
 
         # Request data with end=None (should use today)
-        with patch("trend_analyzer.data_loader.download_daily_adj_close") as mock_download:
+        with patch(
+            "trend_analyzer.data_loader.download_daily_adj_close",
+            side_effect=AssertionError("download should not be called"),
+        ):
             result = load_or_download_series(
                 ticker=ticker,
                 cache_dir=cache_dir,
@@ -259,7 +343,167 @@ def test_load_or_download_series_cache_up_to_today():
             )
 
         # Should return cache without calling download (cache already covers today)
-        mock_download.assert_not_called()
         assert len(result) == len(cache_dates)
-        assert result.index.max() == today
+        assert result.index.max() == cache_dates[-1]
+        assert np.array_equal(result.to_numpy(), cache_data.to_numpy(dtype="float64"))
+
+
+def test_load_or_download_series_migrates_legacy_csv_cache():
+    """Test that a cache written by older versions (CSV) is migrated to Parquet."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        ticker = "TEST"
+
+        cache_dates = pd.date_range("2026-01-20", "2026-01-27", freq="B")
+        cache_data = pd.Series([100.0, 101.0, 102.0, 103.0, 104.0, 105.0], index=cache_dates, name="Close")
+        cache_df = cache_data.to_frame()
+        cache_df.index.name = "Date"
+        cache_df.to_csv(cache_dir / f"{ticker}.csv", index=True, date_format="%Y-%m-%d")
+
+        with patch(
+            "trend_analyzer.data_loader.download_daily_adj_close",
+            side_effect=AssertionError("download should not be called"),
+        ):
+            result = load_or_download_series(
+                ticker=ticker,
+                cache_dir=cache_dir,
+                start=None,
+                end="2026-01-23",
+                refresh=False,
+            )
+        assert len(result) == 6
+        _assert_values(result, {"2026-01-27": 105.0})
+
+        migrated = pd.read_parquet(cache_dir / f"{ticker}.parquet")
+        assert len(migrated) == 6
+        assert migrated.index.max() == pd.Timestamp("2026-01-27")
+
+
+def test_load_or_download_many_single_batched_fetch():
+    """Test that stale tickers are fetched in one batched call and fresh ones are not refetched."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+
+        # FRESH covers the requested end; STALE stops two days earlier
+        fresh_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
+        fresh_df = pd.Series([1.0, 2.0, 3.0, 4.0], index=fresh_dates, name="Close").to_frame()
+        fresh_df.index.name = "Date"
+        fresh_df.to_parquet(cache_dir / "FRESH.parquet")
+
+        stale_dates = pd.date_range("2026-01-19", "2026-01-21", freq="B")
+        stale_df = pd.Series([10.0, 11.0, 12.0], index=stale_dates, name="Close").to_frame()
+        stale_df.index.name = "Date"
+        stale_df.to_parquet(cache_dir / "STALE.parquet")
+
+        new_dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        new_data = pd.DataFrame(
+            {"STALE": [99.0, 99.0, 13.0, 14.0], "NEW": [5.0, 6.0, 7.0, 8.0]},
+            index=new_dates,
+        )
+
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=new_data) as mock_download:
+            result = load_or_download_many(
+                ["FRESH", "STALE", "NEW"],
+                cache_dir=cache_dir,
+                start="2026-01-20",
+                end="2026-01-23",
+            )
+
+        mock_download.assert_called_once()
+        assert sorted(mock_download.call_args.args[0]) == ["NEW", "STALE"]
+        assert mock_download.call_args.kwargs["start"] == "2026-01-20"
+
+        assert len(result["FRESH"]) == 4
+        # Only rows after the cached range are taken from the batch for STALE
+        assert len(result["STALE"]) == 5
+        _assert_values(result["STALE"], {"2026-01-21": 12.0, "2026-01-23": 14.0})
+        assert len(result["NEW"]) == 4
+        assert (cache_dir / "NEW.parquet").exists()
+
+
+def test_load_or_download_series_memoized_within_process():
+    """Test that repeat loads of the same ticker don't hit disk/network and return independent copies."""
+    clear_load_cache()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        ticker = "TEST"
+
+        dates = pd.date_range("2026-01-20", "2026-01-23", freq="D")
+        data = pd.DataFrame({"Close": [100.0, 101.0, 102.0, 103.0]}, index=dates)
+
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=data) as mock_download:
+            first = load_or_download_series(ticker=ticker, cache_dir=cache_dir, start="2026-01-20", end="2026-01-23")
+            first.iloc[0] = -1.0
+            second = load_or_download_series(ticker=ticker, cache_dir=cache_dir, start="2026-01-20", end="2026-01-23")
+
+        assert mock_download.call_count == 1
+        assert second.iloc[0] == 100.0
+
+        # refresh=True bypasses the memo
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=data * 2) as mock_download:
+            refreshed = load_or_download_series(
+                ticker=ticker, cache_dir=cache_dir, start="2026-01-20", end="2026-01-23", refresh=True
+            )
+        mock_download.assert_called_once()
+        assert refreshed.iloc[0] == 200.0
+    clear_load_cache()
+
+
+def test_load_or_download_series_ttl_skips_fetch_when_recently_fetched():
+    """Test that a cache fetched within the category TTL is returned without a download."""
+    clear_load_cache()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_dir = Path(tmpdir)
+        ticker = "TEST"
+
+        cache_dates = pd.date_range("2026-01-20", "2026-01-23", freq="B")
+        cache_df = pd.Series([100.0, 101.0, 102.0, 103.0], index=cache_dates, name="Close").to_frame()
+        cache_df.index.name = "Date"
+        cache_df.to_parquet(cache_dir / f"{ticker}.parquet")
+
+        meta_path = cache_dir / f"{ticker}.meta.json"
+        fetched_at = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=1)
+        meta_path.write_text(json.dumps({"fetched_at": fetched_at.isoformat()}), encoding="utf-8")
+
+        with patch(
+            "trend_analyzer.data_loader.download_daily_adj_close",
+            side_effect=AssertionError("download should not be called"),
+        ):
+            result = load_or_download_series(
+                ticker=ticker, cache_dir=cache_dir, start=None, end=None, category="yield"
+            )
+        assert len(result) == 4
+
+        # Outside the TTL the cache is checked against the source again
+        clear_load_cache()
+        fetched_at = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=30)
+        meta_path.write_text(json.dumps({"fetched_at": fetched_at.isoformat()}), encoding="utf-8")
+        new_data = pd.DataFrame({"Close": [104.0]}, index=pd.DatetimeIndex(["2026-01-26"]))
+
+        with patch("trend_analyzer.data_loader.download_daily_adj_close", return_value=new_data) as mock_download:
+            result = load_or_download_series(
+                ticker=ticker, cache_dir=cache_dir, start=None, end=None, category="yield"
+            )
+        mock_download.assert_called_once()
+        assert len(result) == 5
+        assert pd.Timestamp(json.loads(meta_path.read_text(encoding="utf-8"))["fetched_at"]) > fetched_at
+    clear_load_cache()
+
+
+def test_write_cache_replaces_file_atomically(tmp_path, monkeypatch):
+    from trend_analyzer.data_loader import _read_cache, _write_cache
+
+    p = tmp_path / "T.parquet"
+    old = pd.Series([1.0, 2.0], index=pd.date_range("2024-01-01", periods=2, freq="B"))
+    _write_cache(p, old)
+
+    def _partial_write(self, path, *args, **kwargs):
+        Path(path).write_bytes(b"PAR1 truncated")
+        raise OSError("disk full")
 
+    # A failed rewrite leaves the previous file readable and no temp files behind.
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", _partial_write)
+    with pytest.raises(OSError):
+        _write_cache(p, old * 2)
+    pd.testing.assert_series_equal(_read_cache(p), old, check_names=False, check_freq=False)
+    assert [f.name for f in tmp_path.iterdir()] == ["T.parquet"]
@@ -1,7 +1,7 @@
 import numpy as np
 import pandas as pd
 
-from trend_analyzer.features import cross_asset_features, equity_features
+from trend_analyzer.features import cross_asset_features, equity_features, equity_features_batch
 
 
 def _series(n: int = 400, start: str = "2020-01-01", seed: int = 0, base: float = 100.0) -> pd.Series:
@@ -12,6 +12,15 @@ def _series(n: int = 400, start: str = "2020-01-01", seed: int = 0, base: float
     return pd.Series(px, index=idx)
 
 
+def _series_batch(n: int, seeds: list[int], bases: list[float], start: str = "2020-01-01") -> list[pd.Series]:
+    """Several `_series`-like paths from one RNG draw; used by the batch/correlation tests."""
+    idx = pd.date_range(start, periods=n, freq="B")
+    rng = np.random.default_rng(seeds)
+    steps = rng.normal(0, 1, size=(len(seeds), n))
+    px = np.maximum(np.cumsum(steps, axis=1) + np.asarray(bases, dtype="float64")[:, None], 1.0)
+    return [pd.Series(row, index=idx) for row in px]
+
+
 def test_equity_features_columns_present():
     px = _series()
     f = equity_features(
@@ -28,6 +37,51 @@ def test_equity_features_columns_present():
         assert col in f.columns
 
 
+def test_equity_features_batch_matches_per_series_calls():
+    prices = pd.DataFrame(dict(zip(["a", "b", "c"], _series_batch(500, seeds=[1, 2, 3], bases=[100, 200, 300]))))
+    params = dict(ema_fast=50, ema_slow=200, rsi=14, dd_window=252, vol_windows=[20, 60], price_z_window=60)
+    z_windows = {"a": 252, "b": 160, "c": 160}
+    out = equity_features_batch(prices, z_window=z_windows, **params)
+    assert list(out) == ["a", "b", "c"]
+    for name, f in out.items():
+        pd.testing.assert_frame_equal(f, equity_features(prices[name], z_window=z_windows[name], **params))
+
+
+def test_equity_features_match_pandas_rolling_definitions():
+    px = _series(600)
+    px.iloc[:30] = np.nan
+    px.iloc[[250, 251]] = np.nan
+    f = equity_features(
+        px,
+        ema_fast=50,
+        ema_slow=200,
+        rsi=14,
+        dd_window=252,
+        vol_windows=[20, 60],
+        z_window=120,
+        price_z_window=60,
+    )
+    assert (f.dtypes == np.float32).all()
+    # Features are computed from float32-rounded prices and stored as float32.
+    px = px.astype("float32").astype("float64")
+    lr = np.log(px).diff()
+    ema_slow = px.ewm(span=200, adjust=False).mean()
+    vol20 = lr.rolling(20).std() * np.sqrt(252.0)
+    mom5 = lr.rolling(5).sum()
+    expected = {
+        "lr": lr,
+        "ema_slope": (ema_slow / ema_slow.shift(60) - 1.0) * (252.0 / 60),
+        "dd": px / px.rolling(252).max() - 1.0,
+        "vol20": vol20,
+        "vol60": lr.rolling(60).std() * np.sqrt(252.0),
+        "mom5": mom5,
+        "mom20": lr.rolling(20).sum(),
+        "mom5_vs_sigma": mom5 / (vol20 / np.sqrt(252.0) * np.sqrt(5.0)),
+    }
+    for col, exp in expected.items():
+        pd.testing.assert_series_equal(f[col], exp, check_names=False, check_dtype=False, rtol=1e-6)
+
+
 def test_cross_asset_features_graceful_when_missing_inputs():
     idx = pd.date_range("2020-01-01", periods=300, freq="B")
     aligned = pd.DataFrame({"eq_nifty50": _series(300).reindex(idx)}, index=idx)
@@ -62,3 +116,15 @@ def test_cross_asset_features_some_outputs():
     assert "smallcap_vs_nifty_z" in x.columns
     assert "riskoff_composite" in x.columns
 
+
+def test_cross_asset_correlations_match_pandas_rolling_corr():
+    series = _series_batch(300, seeds=[1, 2, 3], bases=[15000, 1500, 20])
+    aligned = pd.DataFrame({"eq_nifty50": series[0], "ro_gold": series[1], "ro_vix": series[2]})
+    aligned.iloc[[40, 41, 150], 0] = np.nan
+    aligned.iloc[[90, 200], 1] = np.nan
+    x = cross_asset_features(aligned, z_window=60)
+    nifty_lr = np.log(aligned["eq_nifty50"]).diff()
+    expected_gold = nifty_lr.rolling(60).corr(np.log(aligned["ro_gold"]).diff())
+    expected_vix = nifty_lr.rolling(60).corr(aligned["ro_vix"].pct_change())
+    pd.testing.assert_series_equal(x["corr60_nifty_gold"], expected_gold, check_names=False, rtol=1e-9)
+    pd.testing.assert_series_equal(x["corr60_nifty_vix"], expected_vix, check_names=False, rtol=1e-9)
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 from trend_analyzer.indicators import (
     drawdown_from_rolling_high,
@@ -28,6 +29,20 @@ def test_ema_shape_and_nan_handling():
     assert out.isna().sum() == 0
 
 
+def test_ema_and_rsi_match_pandas_with_gaps():
+    s = _price_series()
+    s.iloc[:5] = np.nan
+    s.iloc[[40, 41, 120]] = np.nan
+    expected_ema = s.ewm(span=20, adjust=False).mean()
+    pd.testing.assert_series_equal(ema(s, span=20), expected_ema)
+
+    delta = s.diff()
+    avg_gain = delta.clip(lower=0.0).ewm(alpha=1 / 14, adjust=False).mean()
+    avg_loss = (-delta).clip(lower=0.0).ewm(alpha=1 / 14, adjust=False).mean()
+    expected_rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss.replace(0.0, np.nan))
+    pd.testing.assert_series_equal(rsi_wilder(s, period=14), expected_rsi)
+
+
 def test_rsi_bounds():
     s = _price_series()
     out = rsi_wilder(s, period=14)
@@ -51,6 +66,13 @@ def test_drawdown_is_leq_zero():
     assert (finite <= 0).all()
 
 
+def test_drawdown_matches_pandas_rolling_max_with_gaps():
+    s = _price_series()
+    s.iloc[[5, 100, 101]] = np.nan
+    expected = s / s.rolling(60).max() - 1.0
+    pd.testing.assert_series_equal(drawdown_from_rolling_high(s, window=60), expected)
+
+
 def test_zscore_centered_roughly():
     s = _price_series()
     z = zscore(s, window=60).dropna()
@@ -58,6 +80,21 @@ def test_zscore_centered_roughly():
     assert abs(z.mean()) < 0.25
 
 
+def test_zscore_matches_pandas_rolling_with_gaps():
+    s = _price_series()
+    s.iloc[[10, 200, 201]] = np.nan
+    expected = (s - s.rolling(60).mean()) / s.rolling(60).std()
+    pd.testing.assert_series_equal(zscore(s, window=60), expected, rtol=1e-9)
+
+
+def test_zscore_is_nan_on_flat_window():
+    s = _price_series(n=120)
+    s.iloc[50:90] = s.iloc[49]
+    z = zscore(s, window=20)
+    assert z.iloc[69:90].isna().all()
+    assert z.iloc[90:].notna().all()
+
+
 def test_forward_return_and_fwd_mdd_shapes():
     s = _price_series()
     fr = forward_return(s, horizon_days=21)
@@ -68,3 +105,14 @@ def test_forward_return_and_fwd_mdd_shapes():
     assert fr.tail(21).isna().all()
     assert fmdd.tail(21).isna().all()
 
+
+def test_forward_max_drawdown_matches_sliding_window_reference():
+    s = _price_series()
+    s.iloc[[30, 31, 100]] = np.nan
+    horizon = 21
+    # Zero-copy (n - horizon, horizon + 1) view of every future window; fmax skips NaN like cummax.
+    win = sliding_window_view(s.to_numpy(), horizon + 1)
+    dd = win / np.fmax.accumulate(win, axis=1) - 1.0
+    expected = np.full(len(s), np.nan)
+    expected[: len(win)] = np.where(np.isnan(win[:, -1]), np.nan, np.nanmin(dd, axis=1))
+    np.testing.assert_array_equal(forward_max_drawdown(s, horizon_days=horizon).to_numpy(), expected)
@@ -1,7 +1,11 @@
+from dataclasses import replace
+
 import numpy as np
 import pandas as pd
 
-from trend_analyzer.regime_model import RiskModelConfig, walkforward_logistic_probabilities
+from sklearn.impute import SimpleImputer
+
+from trend_analyzer.regime_model import RiskModelConfig, _RunningMedianImputer, walkforward_logistic_probabilities
 
 
 def test_walkforward_logistic_outputs_probabilities():
@@ -35,3 +39,81 @@ def test_walkforward_logistic_outputs_probabilities():
     assert (finite >= 0).all()
     assert (finite <= 1).all()
 
+
+def test_walkforward_warm_start_tracks_cold_fits():
+    idx = pd.date_range("2018-01-01", periods=900, freq="B")
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"x1": rng.normal(size=len(idx)), "x2": rng.normal(size=len(idx))}, index=idx)
+    p = 1 / (1 + np.exp(-(0.8 * X["x1"] - 0.2 * X["x2"])))
+    # A feature that only becomes available partway through history.
+    X["late"] = rng.normal(size=len(idx))
+    X.iloc[:500, 2] = np.nan
+    y = pd.Series((rng.uniform(size=len(idx)) < p).astype("float64"), index=idx)
+
+    cfg = RiskModelConfig(
+        horizon_days=21,
+        fwd_return_threshold=-0.05,
+        fwd_max_drawdown_threshold=-0.07,
+        min_train_years=1,
+        retrain_frequency="ME",
+        regularization_C=1.0,
+    )
+    cold = walkforward_logistic_probabilities(X=X, y=y, cfg=cfg)
+    warm = walkforward_logistic_probabilities(X=X, y=y, cfg=replace(cfg, warm_start=True))
+    assert warm.notna().equals(cold.notna())
+    assert np.allclose(warm.dropna(), cold.dropna(), atol=1e-3)
+
+
+def test_running_median_imputer_matches_full_refit():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(300, 3))
+    X[rng.uniform(size=X.shape) < 0.2] = np.nan
+    imputer = _RunningMedianImputer().partial_fit(X[:100]).partial_fit(X[100:250]).partial_fit(X[250:])
+    expected = SimpleImputer(strategy="median").fit(X).statistics_
+    assert np.array_equal(imputer.statistics_, expected)
+    assert not np.isnan(imputer.transform(X)).any()
+
+
+def test_walkforward_incremental_preprocessing_tracks_full_refits():
+    idx = pd.date_range("2018-01-01", periods=900, freq="B")
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame({"x1": rng.normal(size=len(idx)), "x2": rng.normal(size=len(idx))}, index=idx)
+    X = X.mask(rng.uniform(size=X.shape) < 0.05)
+    p = 1 / (1 + np.exp(-(0.8 * X["x1"].fillna(0.0) - 0.2 * X["x2"].fillna(0.0))))
+    y = pd.Series((rng.uniform(size=len(idx)) < p).astype("float64"), index=idx)
+
+    cfg = RiskModelConfig(
+        horizon_days=21,
+        fwd_return_threshold=-0.05,
+        fwd_max_drawdown_threshold=-0.07,
+        min_train_years=1,
+        retrain_frequency="ME",
+        regularization_C=1.0,
+    )
+    full = walkforward_logistic_probabilities(X=X, y=y, cfg=cfg)
+    incremental = walkforward_logistic_probabilities(X=X, y=y, cfg=replace(cfg, incremental_preprocessing=True))
+    assert incremental.notna().equals(full.notna())
+    assert np.allclose(incremental.dropna(), full.dropna(), atol=1e-3)
+
+
+def test_walkforward_incremental_preprocessing_handles_unlabelled_tail():
+    idx = pd.date_range("2018-01-01", periods=900, freq="B")
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame({"x1": rng.normal(size=len(idx)), "x2": rng.normal(size=len(idx))}, index=idx)
+    y = pd.Series((rng.uniform(size=len(idx)) < 1 / (1 + np.exp(-X["x1"]))).astype("float64"), index=idx)
+    # No labels for the last ~3 months, so at least one retrain sees no newly labelled rows.
+    y.iloc[-60:] = np.nan
+
+    cfg = RiskModelConfig(
+        horizon_days=21,
+        fwd_return_threshold=-0.05,
+        fwd_max_drawdown_threshold=-0.07,
+        min_train_years=1,
+        retrain_frequency="ME",
+        regularization_C=1.0,
+    )
+    full = walkforward_logistic_probabilities(X=X, y=y, cfg=cfg)
+    incremental = walkforward_logistic_probabilities(X=X, y=y, cfg=replace(cfg, incremental_preprocessing=True))
+    assert incremental.iloc[-40:].notna().all()
+    assert incremental.notna().equals(full.notna())
+    assert np.allclose(incremental.dropna(), full.dropna(), atol=1e-3)
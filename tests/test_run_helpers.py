@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -44,3 +45,71 @@ def test_try_load_candidates_fallback(monkeypatch, tmp_path):
     assert out.name == "x"
     assert calls["n"] == 2
 
+
+def test_try_load_candidates_uses_prefetched(monkeypatch, tmp_path):
+    idx = pd.date_range("2020-01-01", periods=5, freq="B")
+    good = pd.Series([1, 2, 3, 4, 5], index=idx, dtype="float64")
+    calls: list[str] = []
+
+    def fake_loader(*, ticker, cache_dir, start, end, refresh):
+        calls.append(ticker)
+        return good
+
+    monkeypatch.setattr(runmod, "load_or_download_series", fake_loader)
+
+    out = runmod._try_load_candidates(
+        name="x",
+        candidates=["PRE", "OTHER"],
+        cache_dir=tmp_path,
+        start=None,
+        end=None,
+        refresh=False,
+        prefetched={"PRE": good},
+    )
+    assert out is not None and out.name == "x"
+    assert calls == []
+
+    # A prefetched miss is not retried one by one; the next candidate is loaded instead.
+    out = runmod._try_load_candidates(
+        name="x",
+        candidates=["MISS", "OTHER"],
+        cache_dir=tmp_path,
+        start=None,
+        end=None,
+        refresh=False,
+        prefetched={"MISS": None},
+    )
+    assert out is not None
+    assert calls == ["OTHER"]
+
+
+def test_try_load_candidates_reports_prefetched_miss(tmp_path):
+    with pytest.raises(RuntimeError) as exc:
+        runmod._try_load_candidates(
+            name="x",
+            candidates=["MISS"],
+            cache_dir=tmp_path,
+            start=None,
+            end=None,
+            refresh=False,
+            required=True,
+            prefetched={"MISS": None},
+        )
+    assert "not returned by the batched download" in str(exc.value.__cause__)
+
+
+def test_stack_scores_matches_concat_sort():
+    dates = pd.date_range("2024-01-01", periods=6, freq="B")
+    frames = {}
+    for i, name in enumerate(["nifty50", "midcap100", "smallcap100"]):
+        frames[name] = pd.DataFrame(
+            {
+                "date": dates,
+                "score": np.arange(6.0) + 10 * i,
+                "label": pd.Categorical(["a", "b"] * 3, categories=["a", "b", "c"]),
+                "index": name,
+            }
+        )
+    out = runmod._stack_scores(frames)
+    expected = pd.concat(frames.values(), ignore_index=True).sort_values(["date", "index"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, expected)
@@ -40,3 +40,22 @@ def test_safe_haven_trending_up_is_more_overbought_than_trending_down():
     b = odn["safe_score"].tail(100).mean()
     assert a > b
 
+
+def test_safe_haven_weighted_mean_skips_missing_components():
+    out = compute_safe_haven_stretch(_series(), z_windows=(60, 252))
+    units = pd.concat(
+        [
+            ((out["rsi"] - 50.0) / 50.0).clip(-1.0, 1.0),
+            (out["price_z_short"] / 3.0).clip(-1.0, 1.0),
+            (out["price_z_long"] / 3.0).clip(-1.0, 1.0),
+        ],
+        axis=1,
+    )
+    w = np.array([0.50, 0.30, 0.20])
+    denom = units.notna().mul(w, axis=1).sum(axis=1)
+    stretch = units.fillna(0.0).mul(w, axis=1).sum(axis=1) / denom.replace(0.0, np.nan)
+    expected = ((stretch + 1.0) / 2.0 * 100.0).clip(0.0, 100.0)
+    pd.testing.assert_series_equal(out["safe_score"], expected, check_names=False)
+    # Long-window z is still warming up here, so the score comes from RSI and short z alone.
+    assert out["price_z_long"].iloc[100:200].isna().all()
+    assert out["safe_score"].iloc[100:200].notna().all()
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+import pytest
 
 from trend_analyzer.scoring import assemble_final_score, compute_score_components
 
@@ -39,6 +40,83 @@ def test_score_bounds_and_labels():
     assert "label" in out.columns
     assert out["score"].between(0, 100).all()
 
+    # The result owns its data: writing to it leaves the inputs untouched.
+    before = comps.copy()
+    out.iloc[0, : out.columns.get_loc("score") + 1] = 0.0
+    pd.testing.assert_frame_equal(comps, before)
+    assert (p == 0.3).all()
+
+
+def test_scoring_matches_pandas_definition():
+    f32 = _equity_feat().astype(np.float32)
+    f32.iloc[5:9] = np.nan
+    comps = compute_score_components(f32, trend_score_max=60.0, reversion_adj_max=20.0, impulse_adj_max=10.0)
+    assert (comps.dtypes == np.float32).all()
+    f = f32.astype(np.float64)
+    close = dict(check_names=False, check_dtype=False, atol=1e-5)
+
+    trend_raw = (
+        0.35 * f["ema_slope_z"] + 0.20 * f["ema_ratio_z"] + 0.15 * f["d200_z"] - 0.15 * f["dd_z"] + 0.15 * f["mom20_z"]
+    )
+    rsi_unit = ((f["rsi"] - 50.0) / 50.0).clip(-1.0, 1.0)
+    pz_unit = (f["price_z"] / 3.0).clip(-1.0, 1.0)
+    impulse_raw = 0.6 * f["mom5_vs_sigma_z"] + 0.4 * f["mom20_z"]
+    pd.testing.assert_series_equal(comps["trend_score"], (np.tanh(trend_raw / 2.0) + 1.0) / 2.0 * 60.0, **close)
+    pd.testing.assert_series_equal(comps["reversion_adj"], -(0.6 * rsi_unit + 0.4 * pz_unit) * 20.0, **close)
+    pd.testing.assert_series_equal(comps["impulse_adj"], np.tanh(impulse_raw / 2.0) * 10.0, **close)
+
+    rng = np.random.default_rng(1)
+    p = pd.Series(rng.uniform(size=len(f)), index=f.index).iloc[50:]
+    roc = pd.Series(rng.normal(size=len(f)), index=f.index)
+    out = assemble_final_score(
+        components=comps,
+        risk_off_prob=p,
+        riskoff_composite=roc,
+        risk_penalty_max=20.0,
+        neutral_shift=20.0,
+    )
+    p_pen = p.reindex(f.index).fillna(0.0)
+    ctx = np.maximum(p_pen, (roc - 0.25).clip(0.0, 1.0))
+    rev, imp = comps["reversion_adj"].astype(np.float64), comps["impulse_adj"].astype(np.float64)
+    rev_eff = rev.clip(lower=0.0) * (1.0 - 0.70 * ctx) + rev.clip(upper=0.0)
+    imp_eff = imp.clip(lower=0.0) * (1.0 - 0.50 * ctx) + imp.clip(upper=0.0)
+    score = (comps["trend_score"].astype(np.float64) + 20.0 + rev_eff + imp_eff - p_pen * 20.0).clip(0.0, 100.0)
+    pd.testing.assert_series_equal(out["score"], score, check_names=False)
+    assert out["risk_off_prob"].iloc[:50].isna().all()
+    assert out["label"].iloc[5:9].eq("insufficient_data").all()
+
+    # A pre-aligned ndarray is used as-is.
+    out_arr = assemble_final_score(
+        components=comps,
+        risk_off_prob=p,
+        riskoff_composite=roc.to_numpy(),
+        risk_penalty_max=20.0,
+        neutral_shift=20.0,
+    )
+    pd.testing.assert_frame_equal(out_arr, out)
+
+
+def test_assemble_final_score_rejects_misaligned_riskoff_array():
+    comps = compute_score_components(_equity_feat(10), trend_score_max=60.0, reversion_adj_max=20.0, impulse_adj_max=20.0)
+    p = pd.Series(0.3, index=comps.index)
+    with pytest.raises(ValueError):
+        assemble_final_score(
+            components=comps,
+            risk_off_prob=p,
+            riskoff_composite=np.array([1.0, 2.0]),
+            risk_penalty_max=20.0,
+            neutral_shift=20.0,
+        )
+
+
+def test_tanh_approximation_error_bound():
+    from trend_analyzer._kernels import _tanh_pade
+
+    xs = np.linspace(-8.0, 8.0, 4001)
+    approx = np.array([_tanh_pade(x) for x in xs])
+    assert np.abs(approx - np.tanh(xs)).max() < 1e-4
+    assert np.isnan(_tanh_pade(np.nan))
+
 
 def test_label_boundaries():
     from trend_analyzer.scoring import score_to_label
@@ -53,3 +131,21 @@ def test_label_boundaries():
     assert score_to_label(79.999) == "bullish_overboughtish"
     assert score_to_label(80.0) == "euphoric_very_overbought"
 
+
+def test_vectorized_labels_match_scalar_labels():
+    from trend_analyzer.scoring import (
+        safe_haven_score_labels,
+        safe_haven_score_to_label,
+        score_labels,
+        score_to_label,
+    )
+
+    scores = pd.Series([0.0, 19.999, 20.0, 39.999, 40.0, 59.999, 60.0, 79.999, 80.0, 100.0, np.nan])
+    finite = scores.dropna()
+    labels = score_labels(scores)
+    safe = safe_haven_score_labels(scores)
+    assert labels.dtype == "category"
+    assert labels[finite.index].tolist() == [score_to_label(x) for x in finite]
+    assert safe[finite.index].tolist() == [safe_haven_score_to_label(x) for x in finite]
+    assert labels.iloc[-1] == "insufficient_data"
+    assert safe.iloc[-1] == "insufficient_data"
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trend_analyzer.util import write_table
+
+
+def test_write_table_csv_and_parquet_roundtrip(tmp_path):
+    idx = pd.date_range("2020-01-01", periods=5, freq="B", name="date")
+    df = pd.DataFrame({"a": np.arange(5.0), "b": list("vwxyz")}, index=idx)
+
+    csv_path = write_table(df, tmp_path / "t", fmt="csv")
+    assert csv_path.name == "t.csv"
+    back = pd.read_csv(csv_path, index_col="date", parse_dates=True)
+    pd.testing.assert_frame_equal(back, df, check_dtype=False, check_index_type=False, check_freq=False)
+
+    pq_path = write_table(df, tmp_path / "t", fmt="parquet")
+    assert pq_path.name == "t.parquet"
+    pd.testing.assert_frame_equal(pd.read_parquet(pq_path), df, check_freq=False)
+
+    with pytest.raises(ValueError):
+        write_table(df, tmp_path / "t", fmt="xlsx")
@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+# alpha is deliberately a runtime argument. Per-span closures with alpha baked in as a constant ran
+# at the same speed (the loop is bound by its division chain, not the coefficient loads) and each
+# would add ~0.2 s of compilation per process, since closures can't use the on-disk cache.
+@njit(cache=True, nogil=True)
+def ewma(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Recursive EWMA matching ``Series.ewm(alpha=alpha, adjust=False).mean()``.
+
+    Leading NaNs stay NaN; interior NaNs carry the last value forward and decay
+    its weight, exactly as pandas does with ``ignore_na=False``.
+    """
+    n = x.shape[0]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    weighted = x[0]
+    old_wt = 1.0
+    out[0] = weighted
+    for i in range(1, n):
+        cur = x[i]
+        if weighted == weighted:
+            old_wt *= decay
+            if cur == cur:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        out[i] = weighted
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _welford_add(val: float, nobs: int, mean: float, ssqdm: float):
+    nobs += 1
+    delta = val - mean
+    mean += delta / nobs
+    ssqdm += delta * (val - mean)
+    return nobs, mean, ssqdm
+
+
+@njit(cache=True, nogil=True)
+def _welford_remove(val: float, nobs: int, mean: float, ssqdm: float):
+    nobs -= 1
+    if nobs == 0:
+        return 0, 0.0, 0.0
+    delta = val - mean
+    mean -= delta / nobs
+    ssqdm -= delta * (val - mean)
+    return nobs, mean, ssqdm
+
+
+@njit(cache=True, nogil=True)
+def rolling_zscore(x: np.ndarray, window: int) -> np.ndarray:
+    """One-pass ``(x - rolling mean) / rolling std`` over a full, NaN-free window.
+
+    Mean and squared deviations are updated with Welford add/remove steps, so
+    long series do not accumulate cancellation error. A window of identical
+    values is treated as zero variance (NaN output), like pandas.
+    """
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    same = 0
+    prev = np.nan
+    for i in range(n):
+        val = x[i]
+        if val == val:
+            if val == prev:
+                same += 1
+            else:
+                same = 1
+                prev = val
+            nobs, mean, ssqdm = _welford_add(val, nobs, mean, ssqdm)
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                nobs, mean, ssqdm = _welford_remove(old, nobs, mean, ssqdm)
+        if nobs == window and nobs > 1 and same < nobs:
+            var = ssqdm / (nobs - 1)
+            if var > 0.0:
+                out[i] = (val - mean) / np.sqrt(var)
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Sample std over a full, NaN-free window (``rolling(window).std()``)."""
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    same = 0
+    prev = np.nan
+    for i in range(n):
+        val = x[i]
+        if val == val:
+            if val == prev:
+                same += 1
+            else:
+                same = 1
+                prev = val
+            nobs, mean, ssqdm = _welford_add(val, nobs, mean, ssqdm)
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                nobs, mean, ssqdm = _welford_remove(old, nobs, mean, ssqdm)
+        if nobs == window and nobs > 1:
+            if same >= nobs:
+                out[i] = 0.0
+            else:
+                out[i] = np.sqrt(max(ssqdm / (nobs - 1), 0.0))
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Compensated running sum over a full, NaN-free window."""
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    nobs = 0
+    total = 0.0
+    comp = 0.0
+    for i in range(n):
+        val = x[i]
+        if val == val:
+            nobs += 1
+            y = val - comp
+            t = total + y
+            comp = (t - total) - y
+            total = t
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                nobs -= 1
+                y = -old - comp
+                t = total + y
+                comp = (t - total) - y
+                total = t
+        if nobs == window:
+            out[i] = total
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rolling_corr_many(a: np.ndarray, b: np.ndarray, window: int) -> np.ndarray:
+    """Rolling Pearson correlation of ``a`` against every column of ``b`` (shape (n, k)).
+
+    Column ``j`` of the result matches ``Series(a).rolling(window).corr(Series(b[:, j]))``:
+    a pair drops out if either side is NaN, and the output is NaN until the window
+    holds ``window`` jointly valid pairs. All columns are updated in one pass over
+    the rows, with per-column Welford state (means, second moments, co-moment).
+    """
+    n, k = b.shape
+    out = np.full_like(b, np.nan)
+    nobs = np.zeros(k, dtype=np.int64)
+    mean_a = np.zeros(k)
+    mean_b = np.zeros(k)
+    m2_a = np.zeros(k)
+    m2_b = np.zeros(k)
+    co_ab = np.zeros(k)
+    for i in range(n):
+        x_new = a[i]
+        x_old = a[i - window] if i >= window else np.nan
+        for j in range(k):
+            x = x_new
+            y = b[i, j]
+            if x == x and y == y:
+                nobs[j] += 1
+                dx = x - mean_a[j]
+                dy = y - mean_b[j]
+                mean_a[j] += dx / nobs[j]
+                mean_b[j] += dy / nobs[j]
+                m2_a[j] += dx * (x - mean_a[j])
+                m2_b[j] += dy * (y - mean_b[j])
+                co_ab[j] += dx * (y - mean_b[j])
+            if i >= window:
+                x = x_old
+                y = b[i - window, j]
+                if x == x and y == y:
+                    nobs[j] -= 1
+                    if nobs[j] == 0:
+                        mean_a[j] = mean_b[j] = m2_a[j] = m2_b[j] = co_ab[j] = 0.0
+                    else:
+                        dx = x - mean_a[j]
+                        dy = y - mean_b[j]
+                        mean_a[j] -= dx / nobs[j]
+                        mean_b[j] -= dy / nobs[j]
+                        m2_a[j] -= (x - mean_a[j]) * dx
+                        m2_b[j] -= (y - mean_b[j]) * dy
+                        co_ab[j] -= (x - mean_a[j]) * dy
+            if nobs[j] == window and window > 1:
+                den = m2_a[j] * m2_b[j]
+                if den > 0.0:
+                    out[i, j] = co_ab[j] / np.sqrt(den)
+    return out
+
+
+@njit(cache=True, nogil=True)
+def drawdown_from_rolling_high(x: np.ndarray, window: int) -> np.ndarray:
+    """``x / rolling(window).max() - 1`` using a monotonic deque of window indices."""
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    dq = np.empty(window, dtype=np.int64)
+    head = 0
+    size = 0
+    n_missing = 0
+    for i in range(n):
+        if size > 0 and dq[head] <= i - window:
+            head = (head + 1) % window
+            size -= 1
+        if i >= window:
+            old = x[i - window]
+            if old != old:
+                n_missing -= 1
+        val = x[i]
+        if val != val:
+            n_missing += 1
+        else:
+            while size > 0 and x[dq[(head + size - 1) % window]] <= val:
+                size -= 1
+            dq[(head + size) % window] = i
+            size += 1
+        if i >= window - 1 and n_missing == 0:
+            out[i] = val / x[dq[head]] - 1.0
+    return out
+
+
+@njit(cache=True, nogil=True)
+def rsi_wilder(px: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI; NaN where the average loss is zero or undefined."""
+    n = px.shape[0]
+    gain = np.empty(n)
+    loss = np.empty(n)
+    if n > 0:
+        gain[0] = np.nan
+        loss[0] = np.nan
+    for i in range(1, n):
+        delta = px[i] - px[i - 1]
+        gain[i] = max(delta, 0.0) if delta == delta else np.nan
+        loss[i] = max(-delta, 0.0) if delta == delta else np.nan
+    alpha = 1.0 / period
+    avg_gain = ewma(gain, alpha)
+    avg_loss = ewma(loss, alpha)
+    out = np.full_like(px, np.nan)
+    for i in range(n):
+        if avg_loss[i] != 0.0:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain[i] / avg_loss[i])
+    return out
+
+
+@njit(cache=True, nogil=True)
+def forward_max_drawdown(p: np.ndarray, horizon: int) -> np.ndarray:
+    """Worst peak-to-trough move within ``p[i..i+horizon]`` for every ``i``.
+
+    NaN prices are skipped inside the window; rows whose window end is missing
+    (or runs past the series) are NaN.
+    """
+    n = p.shape[0]
+    out = np.full_like(p, np.nan)
+    for i in range(n - horizon):
+        end = p[i + horizon]
+        if end != end:
+            continue
+        peak = np.nan
+        worst = np.nan
+        for j in range(i, i + horizon + 1):
+            v = p[j]
+            if v != v:
+                continue
+            if not v <= peak:
+                peak = v
+            dd = v / peak - 1.0
+            if not dd >= worst:
+                worst = dd
+        out[i] = worst
+    return out
+
+
+@njit(cache=True, nogil=True)
+def equity_feature_matrix(
+    px: np.ndarray,
+    ema_fast: int,
+    ema_slow: int,
+    rsi_period: int,
+    dd_window: int,
+    vol_windows: np.ndarray,
+    z_window: int,
+    price_z_window: int,
+    slope_days: int,
+) -> np.ndarray:
+    """All ``features.equity_features`` columns as rows of one (n_features, n) array.
+
+    Row order: px, lr, ema_fast, ema_slow, ema_ratio, ema_slope, d200, rsi,
+    price_z, dd, vol<w> per window, mom5, mom20, mom5_vs_sigma, then the
+    z-scores of ema_slope, ema_ratio, d200, dd, mom20 and mom5_vs_sigma.
+    """
+    n = px.shape[0]
+    n_vol = vol_windows.shape[0]
+    # Everything is computed in float64; only the stored block takes the input dtype.
+    p = px.astype(np.float64)
+    out = np.empty((19 + n_vol, n), dtype=px.dtype)
+
+    lr = np.full(n, np.nan)
+    for i in range(1, n):
+        lr[i] = np.log(p[i]) - np.log(p[i - 1])
+    fast = ewma(p, 2.0 / (ema_fast + 1.0))
+    slow = ewma(p, 2.0 / (ema_slow + 1.0))
+    ratio = fast / slow - 1.0
+    slope = np.full(n, np.nan)
+    for i in range(slope_days, n):
+        slope[i] = (slow[i] / slow[i - slope_days] - 1.0) * (252.0 / slope_days)
+    d200 = p / slow - 1.0
+    dd = drawdown_from_rolling_high(p, dd_window)
+
+    out[0] = p
+    out[1] = lr
+    out[2] = fast
+    out[3] = slow
+    out[4] = ratio
+    out[5] = slope
+    out[6] = d200
+    out[7] = rsi_wilder(p, rsi_period)
+    out[8] = rolling_zscore(p, price_z_window)
+    out[9] = dd
+
+    vol20 = np.full(n, np.nan)
+    has_vol20 = False
+    for k in range(n_vol):
+        vol = rolling_std(lr, vol_windows[k]) * np.sqrt(252.0)
+        out[10 + k] = vol
+        if vol_windows[k] == 20:
+            vol20 = vol
+            has_vol20 = True
+
+    mom5 = rolling_sum(lr, 5)
+    mom20 = rolling_sum(lr, 20)
+    mom5_vs_sigma = np.full(n, np.nan)
+    if has_vol20:
+        for i in range(n):
+            mom5_sigma = vol20[i] / np.sqrt(252.0) * np.sqrt(5.0)
+            if mom5_sigma != 0.0:
+                mom5_vs_sigma[i] = mom5[i] / mom5_sigma
+
+    r = 10 + n_vol
+    out[r] = mom5
+    out[r + 1] = mom20
+    out[r + 2] = mom5_vs_sigma
+    out[r + 3] = rolling_zscore(slope, z_window)
+    out[r + 4] = rolling_zscore(ratio, z_window)
+    out[r + 5] = rolling_zscore(d200, z_window)
+    out[r + 6] = rolling_zscore(dd, z_window)
+    out[r + 7] = rolling_zscore(mom20, z_window)
+    out[r + 8] = rolling_zscore(mom5_vs_sigma, z_window)
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _clip(x: float, lo: float, hi: float) -> float:
+    # NaN-preserving, like Series.clip.
+    if x < lo:
+        return lo
+    if x > hi:
+        return hi
+    return x
+
+
+@njit(cache=True, nogil=True)
+def _tanh_pade(x: float) -> float:
+    # [7/6] Pade approximant of tanh, saturated beyond |x| = 4.97; abs error < 1e-4 everywhere,
+    # about 6x cheaper than libm tanh. NaN propagates.
+    if x > 4.97:
+        return 1.0
+    if x < -4.97:
+        return -1.0
+    x2 = x * x
+    return x * (135135.0 + x2 * (17325.0 + x2 * (378.0 + x2))) / (135135.0 + x2 * (62370.0 + x2 * (3150.0 + 28.0 * x2)))
+
+
+@njit(cache=True, nogil=True)
+def score_components(
+    ema_slope_z: np.ndarray,
+    ema_ratio_z: np.ndarray,
+    d200_z: np.ndarray,
+    dd_z: np.ndarray,
+    mom20_z: np.ndarray,
+    rsi: np.ndarray,
+    price_z: np.ndarray,
+    mom5_vs_sigma_z: np.ndarray,
+    trend_score_max: float,
+    reversion_adj_max: float,
+    impulse_adj_max: float,
+) -> np.ndarray:
+    """Rows: trend_score, reversion_adj, impulse_adj, rsi_unit, pricez_unit, trend_raw, impulse_raw."""
+    n = ema_slope_z.shape[0]
+    out = np.empty((7, n), dtype=ema_slope_z.dtype)
+    for i in range(n):
+        trend_raw = (
+            0.35 * np.float64(ema_slope_z[i])
+            + 0.20 * np.float64(ema_ratio_z[i])
+            + 0.15 * np.float64(d200_z[i])
+            - 0.15 * np.float64(dd_z[i])
+            + 0.15 * np.float64(mom20_z[i])
+        )
+        trend_score = (_tanh_pade(trend_raw / 2.0) + 1.0) / 2.0 * trend_score_max
+
+        rsi_unit = _clip((np.float64(rsi[i]) - 50.0) / 50.0, -1.0, 1.0)
+        pz_unit = _clip(np.float64(price_z[i]) / 3.0, -1.0, 1.0)
+        reversion_adj = -(0.6 * rsi_unit + 0.4 * pz_unit) * reversion_adj_max
+
+        impulse_raw = 0.6 * np.float64(mom5_vs_sigma_z[i]) + 0.4 * np.float64(mom20_z[i])
+        impulse_adj = _tanh_pade(impulse_raw / 2.0) * impulse_adj_max
+
+        out[0, i] = trend_score
+        out[1, i] = reversion_adj
+        out[2, i] = impulse_adj
+        out[3, i] = rsi_unit
+        out[4, i] = pz_unit
+        out[5, i] = trend_raw
+        out[6, i] = impulse_raw
+    return out
+
+
+@njit(cache=True, nogil=True)
+def final_score(
+    trend_score: np.ndarray,
+    reversion_adj: np.ndarray,
+    impulse_adj: np.ndarray,
+    risk_off_prob: np.ndarray,
+    riskoff_composite: np.ndarray,
+    risk_penalty_max: float,
+    neutral_shift: float,
+) -> np.ndarray:
+    """Rows: risk_penalty, risk_context, reversion_adj_eff, impulse_adj_eff, score.
+
+    An empty ``riskoff_composite`` means "not available" (risk context is then the
+    risk-off probability alone).
+    """
+    n = trend_score.shape[0]
+    has_roc = riskoff_composite.shape[0] > 0
+    out = np.empty((5, n))
+    for i in range(n):
+        p = risk_off_prob[i]
+        if p != p:
+            p = 0.0
+        risk_penalty = p * risk_penalty_max
+        risk_context = p
+        if has_roc:
+            rc2 = _clip(riskoff_composite[i] - 0.25, 0.0, 1.0)
+            if rc2 == rc2 and rc2 > risk_context:
+                risk_context = rc2
+
+        # Damp positive (bullish) adjustments when risk context is high.
+        rev_eff = np.float64(reversion_adj[i])
+        if rev_eff > 0.0:
+            rev_eff *= 1.0 - 0.70 * risk_context
+        imp_eff = np.float64(impulse_adj[i])
+        if imp_eff > 0.0:
+            imp_eff *= 1.0 - 0.50 * risk_context
+
+        score = np.float64(trend_score[i]) + neutral_shift + rev_eff + imp_eff - risk_penalty
+        out[0, i] = risk_penalty
+        out[1, i] = risk_context
+        out[2, i] = rev_eff
+        out[3, i] = imp_eff
+        out[4, i] = _clip(score, 0.0, 100.0)
+    return out
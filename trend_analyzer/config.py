@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import copy
+import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -13,11 +16,10 @@ class AppConfig:
 
     @staticmethod
     def load(path: str | Path) -> "AppConfig":
-        p = Path(path)
-        data = yaml.safe_load(p.read_text(encoding="utf-8"))
-        if not isinstance(data, dict):
-            raise ValueError("Config must be a YAML mapping/object at the top level.")
-        return AppConfig(raw=data)
+        # Parsed YAML is memoized per process; keying on mtime picks up edits to the file.
+        # Each call gets its own copy, so callers can't mutate what later loads return.
+        p = Path(path).resolve()
+        return AppConfig(raw=copy.deepcopy(_load_yaml_cached(str(p), os.stat(p).st_mtime_ns)))
 
     def get(self, *keys: str, default: Any = None) -> Any:
         node: Any = self.raw
@@ -27,3 +29,10 @@ class AppConfig:
             node = node[k]
         return node
 
+
+@lru_cache(maxsize=8)
+def _load_yaml_cached(path_str: str, mtime_ns: int) -> dict[str, Any]:
+    data = yaml.safe_load(Path(path_str).read_text(encoding="utf-8"))
+    if not isinstance(data, dict):
+        raise ValueError("Config must be a YAML mapping/object at the top level.")
+    return data
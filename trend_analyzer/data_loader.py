@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
+import os
+import tempfile
+import threading
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Literal, Mapping
 
 import pandas as pd
 import yfinance as yf
@@ -11,6 +16,24 @@ import yfinance as yf
 from .util import ensure_dir, safe_filename
 
 
+CacheCategory = Literal["equity", "yield", "fx", "vix"]
+
+# How long a successful fetch is trusted before the cache is checked against the source again.
+# Equities are special-cased: a fetch stays fresh until the next NSE close (see `_next_equity_close`).
+CACHE_TTL_BY_CATEGORY: dict[str, pd.Timedelta] = {
+    "yield": pd.Timedelta(hours=24),
+    "fx": pd.Timedelta(hours=24),
+    "vix": pd.Timedelta(hours=24),
+}
+
+# Serializes cache file writes when tickers are loaded from several threads. Readers take no lock:
+# writes go through `_replace_atomically`, so a reader sees either the old or the new file.
+_CACHE_WRITE_LOCK = threading.Lock()
+
+_NSE_TZ = "Asia/Kolkata"
+_NSE_CLOSE = pd.Timedelta(hours=15, minutes=30)
+
+
 @dataclass(frozen=True)
 class SeriesSpec:
     name: str
@@ -66,9 +89,7 @@ def download_daily_adj_close(
             if "Close" not in df.columns:
                 raise RuntimeError("No 'Close' column found in downloaded data.")
             close = df[["Close"]].copy()
-            ticker_list = list(tickers)
-            if ticker_list:
-                close.columns = [ticker_list[0]]  # Use first ticker as column name
+            close.columns = [ticker_list[0]]  # Use first ticker as column name
     except (KeyError, IndexError) as e:
         raise RuntimeError(f"Failed to extract Close prices from downloaded data: {e}") from e
 
@@ -82,16 +103,102 @@ def download_daily_adj_close(
 
 
 def cache_path(cache_dir: Path, ticker: str) -> Path:
+    return cache_dir / f"{safe_filename(ticker)}.parquet"
+
+
+def legacy_csv_cache_path(cache_dir: Path, ticker: str) -> Path:
     return cache_dir / f"{safe_filename(ticker)}.csv"
 
 
-def load_or_download_series(
+def _read_cache(p: Path) -> pd.Series:
+    # Only the Close column is needed; Parquet lets us skip decoding anything else.
+    df = pd.read_parquet(p, engine="pyarrow", columns=["Close"]).sort_index()
+    return df["Close"].astype("float64")
+
+
+def _replace_atomically(p: Path, write) -> None:
+    # Write to a temp file next to `p`, then swap it in, so readers never see a partial file.
+    fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, p)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _write_cache(p: Path, s: pd.Series) -> None:
+    out = s.rename("Close").to_frame()
+    out.index.name = "Date"
+    _replace_atomically(p, lambda tmp: out.to_parquet(tmp, engine="pyarrow", compression="zstd"))
+
+
+def meta_path(cache_dir: Path, ticker: str) -> Path:
+    return cache_dir / f"{safe_filename(ticker)}.meta.json"
+
+
+def _read_meta(cache_dir: Path, ticker: str) -> dict | None:
+    p = meta_path(cache_dir, ticker)
+    if not p.exists():
+        return None
+    try:
+        meta = json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+def _write_meta(cache_dir: Path, ticker: str) -> None:
+    meta = {"fetched_at": pd.Timestamp.now(tz="UTC").isoformat()}
+    _replace_atomically(meta_path(cache_dir, ticker), lambda tmp: Path(tmp).write_text(json.dumps(meta), encoding="utf-8"))
+
+
+def _next_equity_close(fetched_at: pd.Timestamp) -> pd.Timestamp:
+    local = fetched_at.tz_convert(_NSE_TZ)
+    close = local.normalize() + _NSE_CLOSE
+    if close <= local:
+        close += pd.Timedelta(days=1)
+    return close
+
+
+def _within_ttl(
+    cache_dir: Path,
     ticker: str,
-    cache_dir: str | Path,
-    start: str | None,
-    end: str | None,
-    refresh: bool = False,
-) -> pd.Series:
+    category: CacheCategory | None,
+    ttl: pd.Timedelta | None,
+) -> bool:
+    """True if the last successful fetch for `ticker` is recent enough to skip the network."""
+    if category is None and ttl is None:
+        return False
+    meta = _read_meta(cache_dir, ticker)
+    if meta is None or "fetched_at" not in meta:
+        return False
+    try:
+        fetched_at = pd.Timestamp(meta["fetched_at"])
+    except (TypeError, ValueError):
+        return False
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.tz_localize("UTC")
+    now = pd.Timestamp.now(tz="UTC")
+    if ttl is not None:
+        return now - fetched_at < ttl
+    if category == "equity":
+        return now < _next_equity_close(fetched_at)
+    return now - fetched_at < CACHE_TTL_BY_CATEGORY[category]
+
+
+def _migrate_csv_cache(csv_p: Path, p: Path) -> None:
+    # One-shot migration of caches written by older versions (CSV) to Parquet.
+    # pyarrow is already required for the Parquet cache, so use its multithreaded CSV reader.
+    df = pd.read_csv(
+        csv_p, engine="pyarrow", usecols=["Date", "Close"], parse_dates=["Date"]
+    ).set_index("Date").sort_index()
+    with _CACHE_WRITE_LOCK:
+        _write_cache(p, df["Close"].astype("float64"))
+
+
+def _prepare_cache_dir(cache_dir: str | Path) -> Path:
     cache_dir_p = ensure_dir(cache_dir)
     # yfinance maintains a timezone cache in a SQLite DB under the user profile by default.
     # In restricted/sandboxed environments this can fail, so we pin it to our project cache dir.
@@ -101,39 +208,87 @@ def load_or_download_series(
     except Exception:
         # If the API changes, we can still run without forcing the location.
         pass
-    p = cache_path(cache_dir_p, ticker)
+    return cache_dir_p
 
-    cached_s: pd.Series | None = None
-    cache_last_date: pd.Timestamp | None = None
 
+def _load_cached(cache_dir_p: Path, ticker: str, refresh: bool) -> pd.Series | None:
     # Load existing cache if available and not forcing refresh
-    if p.exists() and not refresh:
-        df = pd.read_csv(p, parse_dates=["Date"])
-        df = df.set_index("Date").sort_index()
-        cached_s = df["Close"].astype("float64")
-        if not cached_s.empty:
-            cache_last_date = cached_s.index.max()
-
-    # Determine what we need to fetch
+    if refresh:
+        return None
+    p = cache_path(cache_dir_p, ticker)
+    if not p.exists():
+        csv_p = legacy_csv_cache_path(cache_dir_p, ticker)
+        if not csv_p.exists():
+            return None
+        _migrate_csv_cache(csv_p, p)
+    return _read_cache(p)
+
+
+def _fetch_window(cached_s: pd.Series | None, start: str | None, end: str | None) -> tuple[str | None, str] | None:
+    """Return the (start, end) range still missing from the cache, or None if the cache is fresh."""
     # When end is None, explicitly use today's date (not None) to avoid timezone/interpretation issues
     today = pd.Timestamp.today().normalize()
     effective_end = end if end is not None else today.strftime("%Y-%m-%d")
 
-    fetch_start = start
-    fetch_end = effective_end
+    if cached_s is None or cached_s.empty:
+        return start, effective_end
 
     # If we have cache, only fetch incremental data beyond cache
-    if cached_s is not None and cache_last_date is not None:
-        end_ts = pd.to_datetime(effective_end).normalize()
-        cache_last_normalized = cache_last_date.normalize()
+    end_ts = pd.to_datetime(effective_end).normalize()
+    cache_last_normalized = cached_s.index.max().normalize()
+    # No bar can exist after the last business day on/before end (weekends), so a cache
+    # ending on Friday already covers a Saturday/Sunday end date.
+    expected_last = pd.offsets.BDay().rollback(end_ts)
 
-        # If cache already covers or exceeds the requested end date, return cache
-        if cache_last_normalized >= end_ts:
-            return cached_s
+    # If cache already covers or exceeds the requested end date, nothing to fetch (no network)
+    if cache_last_normalized >= expected_last:
+        return None
+
+    # Fetch from day after cache last date up to effective_end
+    fetch_start = (cache_last_normalized + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    return fetch_start, effective_end
 
-        # Fetch from day after cache last date up to effective_end
-        fetch_start = (cache_last_normalized + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
-        fetch_end = effective_end
+
+def _merge_and_save(cache_dir: Path, ticker: str, cached_s: pd.Series | None, new_s: pd.Series) -> pd.Series:
+    # Merge cache + new data
+    # yfinance can repeat its last row, so the download itself must be unique for the fast path.
+    new_clean = new_s.index.is_unique and new_s.index.is_monotonic_increasing
+    if cached_s is not None and not cached_s.empty:
+        combined = pd.concat([cached_s, new_s])
+        # Common incremental case: new rows strictly after the cache -> already unique and sorted.
+        if not (new_clean and new_s.index.min() > cached_s.index.max()):
+            # Overlap: drop duplicates in one hash pass (keep new if overlap), then sort.
+            combined = combined[~combined.index.duplicated(keep="last")].sort_index()
+    else:
+        combined = new_s if new_clean else new_s[~new_s.index.duplicated(keep="last")].sort_index()
+
+    # Save updated cache (+ fetch timestamp for TTL checks)
+    with _CACHE_WRITE_LOCK:
+        _write_cache(cache_path(cache_dir, ticker), combined)
+        _write_meta(cache_dir, ticker)
+    return combined
+
+
+def _load_or_download_series(
+    ticker: str,
+    cache_dir: str | Path,
+    start: str | None,
+    end: str | None,
+    refresh: bool = False,
+    category: CacheCategory | None = None,
+    ttl: pd.Timedelta | None = None,
+) -> pd.Series:
+    cache_dir_p = _prepare_cache_dir(cache_dir)
+    cached_s = _load_cached(cache_dir_p, ticker, refresh)
+
+    # Fetched recently enough for this kind of series: trust the cache as-is.
+    if cached_s is not None and _within_ttl(cache_dir_p, ticker, category, ttl):
+        return cached_s
+
+    window = _fetch_window(cached_s, start, end)
+    if window is None:
+        return cached_s
+    fetch_start, fetch_end = window
 
     # Fetch new data (if needed)
     try:
@@ -147,26 +302,122 @@ def load_or_download_series(
             return cached_s
         raise
 
-    # Merge cache + new data
-    if cached_s is not None:
-        # Combine: cache + new data, dropping duplicates (keep new if overlap)
-        combined = pd.concat([cached_s, new_s])
-        combined = combined[~combined.index.duplicated(keep="last")].sort_index()
-    else:
-        combined = new_s
+    return _merge_and_save(cache_dir_p, ticker, cached_s, new_s)
 
-    # Save updated cache
-    out = combined.to_frame()
-    out.index.name = "Date"
-    out.to_csv(p, index=True)
-    return combined
+
+@lru_cache(maxsize=256)
+def _load_or_download_cached(
+    ticker: str,
+    cache_dir: str,
+    start: str | None,
+    end_day: str,
+    category: CacheCategory | None,
+    ttl: pd.Timedelta | None,
+) -> pd.Series:
+    return _load_or_download_series(ticker, cache_dir, start, end_day, refresh=False, category=category, ttl=ttl)
+
+
+def clear_load_cache() -> None:
+    """Drop the in-process memo used by `load_or_download_series`."""
+    _load_or_download_cached.cache_clear()
+
+
+def load_or_download_series(
+    ticker: str,
+    cache_dir: str | Path,
+    start: str | None,
+    end: str | None,
+    refresh: bool = False,
+    category: CacheCategory | None = None,
+    ttl: pd.Timedelta | None = None,
+) -> pd.Series:
+    """
+    Load a ticker's close series from the on-disk cache, fetching only what is missing.
+
+    Results are memoized per process on (ticker, cache_dir, start, end day), so repeated loads
+    of the same ticker are dict lookups. refresh=True bypasses (and resets) the memo.
+
+    When `category` (or an explicit `ttl`) is given, a cache fetched within that TTL is returned
+    without any network call (see `CACHE_TTL_BY_CATEGORY`).
+    """
+    if refresh:
+        clear_load_cache()
+        return _load_or_download_series(ticker, cache_dir, start, end, refresh=True, category=category, ttl=ttl)
+    # end=None means "up to today": quantize it to the calendar day so the memo expires daily.
+    end_day = end if end is not None else pd.Timestamp.today().normalize().strftime("%Y-%m-%d")
+    # Return a copy so callers can't mutate the memoized series.
+    return _load_or_download_cached(ticker, str(cache_dir), start, end_day, category, ttl).copy()
+
+
+def load_or_download_many(
+    tickers: Iterable[str],
+    cache_dir: str | Path,
+    start: str | None,
+    end: str | None,
+    refresh: bool = False,
+    categories: Mapping[str, CacheCategory] | None = None,
+) -> dict[str, pd.Series]:
+    """
+    Batched variant of `load_or_download_series`.
+
+    Tickers whose cache is stale are fetched with a single `download_daily_adj_close` call
+    instead of one request per ticker. Tickers with neither cache nor downloaded data are
+    omitted from the result. `categories` maps tickers to their TTL category.
+    """
+    categories = categories or {}
+    cache_dir_p = _prepare_cache_dir(cache_dir)
+
+    out: dict[str, pd.Series] = {}
+    cached: dict[str, pd.Series | None] = {}
+    windows: dict[str, tuple[str | None, str]] = {}
+    for t in dict.fromkeys(tickers):
+        cached_s = _load_cached(cache_dir_p, t, refresh)
+        if cached_s is not None and _within_ttl(cache_dir_p, t, categories.get(t), None):
+            out[t] = cached_s
+            continue
+        window = _fetch_window(cached_s, start, end)
+        if window is None:
+            out[t] = cached_s
+        else:
+            cached[t] = cached_s
+            windows[t] = window
+    if not windows:
+        return out
+
+    # One request covering every stale ticker: earliest missing start (None = full history).
+    starts = [w[0] for w in windows.values()]
+    batch_start = None if any(s is None for s in starts) else min(starts)
+    batch_end = max(w[1] for w in windows.values())
+    try:
+        close = download_daily_adj_close(list(windows), start=batch_start, end=batch_end)
+    except RuntimeError:
+        close = None
+
+    for t, (fetch_start, _) in windows.items():
+        cached_s = cached[t]
+        new_s = None
+        if close is not None and t in close.columns:
+            new_s = close[t].dropna().rename("Close")
+            if fetch_start is not None:
+                new_s = new_s.loc[fetch_start:]
+        if new_s is None or new_s.empty:
+            # No new data available for this ticker; fall back to whatever is cached.
+            if cached_s is not None:
+                out[t] = cached_s
+            continue
+        out[t] = _merge_and_save(cache_dir_p, t, cached_s, new_s)
+    return out
 
 
 def align_series(
     series_map: dict[str, pd.Series],
     max_forward_fill_days: int = 3,
 ) -> pd.DataFrame:
-    df = pd.DataFrame({k: v for k, v in series_map.items()})
+    if not series_map:
+        return pd.DataFrame()
+    # Single outer-join concat over the union of all input indices.
+    df = pd.concat(list(series_map.values()), axis=1, join="outer")
+    df.columns = list(series_map.keys())
     df.index = pd.to_datetime(df.index).tz_localize(None)
     df = df.sort_index()
 
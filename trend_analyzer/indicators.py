@@ -3,21 +3,21 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from . import _kernels
+
+
+def _values(s: pd.Series) -> np.ndarray:
+    # float32 input stays float32 (kernels return the input dtype); anything else becomes float64.
+    dtype = np.float32 if s.dtype == np.float32 else np.float64
+    return s.to_numpy(dtype=dtype, na_value=np.nan)
+
 
 def ema(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False).mean()
+    return pd.Series(_kernels.ewma(_values(s), 2.0 / (span + 1.0)), index=s.index, name=s.name)
 
 
 def rsi_wilder(close: pd.Series, period: int = 14) -> pd.Series:
-    delta = close.diff()
-    gain = delta.clip(lower=0.0)
-    loss = (-delta).clip(lower=0.0)
-
-    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-    rs = avg_gain / avg_loss.replace(0.0, np.nan)
-    rsi = 100.0 - (100.0 / (1.0 + rs))
-    return rsi
+    return pd.Series(_kernels.rsi_wilder(_values(close), period), index=close.index, name=close.name)
 
 
 def log_returns(price: pd.Series) -> pd.Series:
@@ -33,14 +33,12 @@ def realized_vol(price: pd.Series, window: int, annualize: bool = True) -> pd.Se
 
 
 def drawdown_from_rolling_high(price: pd.Series, window: int) -> pd.Series:
-    rolling_high = price.rolling(window).max()
-    return price / rolling_high - 1.0
+    dd = _kernels.drawdown_from_rolling_high(_values(price), window)
+    return pd.Series(dd, index=price.index, name=price.name)
 
 
 def zscore(s: pd.Series, window: int) -> pd.Series:
-    mu = s.rolling(window).mean()
-    sd = s.rolling(window).std()
-    return (s - mu) / sd.replace(0.0, np.nan)
+    return pd.Series(_kernels.rolling_zscore(_values(s), window), index=s.index, name=s.name)
 
 
 def clamp(s: pd.Series, lo: float, hi: float) -> pd.Series:
@@ -52,13 +50,6 @@ def forward_return(price: pd.Series, horizon_days: int) -> pd.Series:
 
 
 def forward_max_drawdown(price: pd.Series, horizon_days: int) -> pd.Series:
-    # Compute max drawdown over the *future* window [t..t+horizon]
-    # Vectorized across horizon (small: ~21 days).
-    future = pd.concat([price.shift(-i) for i in range(horizon_days + 1)], axis=1)
-    running_max = future.cummax(axis=1)
-    dd = future / running_max - 1.0
-    fmdd = dd.min(axis=1)
-    # Require a full future window; otherwise return NaN (matches forward_return behavior).
-    full_window_available = price.shift(-horizon_days).notna()
-    return fmdd.where(full_window_available)
-
+    # Max drawdown over the *future* window [t..t+horizon]; NaN unless the full
+    # future window is available (matches forward_return behavior).
+    return pd.Series(_kernels.forward_max_drawdown(_values(price), horizon_days), index=price.index)
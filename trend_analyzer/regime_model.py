@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.linear_model import LogisticRegression
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import Pipeline
@@ -18,6 +19,46 @@ class RiskModelConfig:
     min_train_years: int
     retrain_frequency: str  # pandas offset alias, e.g. "M"
     regularization_C: float
+    # Start each monthly L-BFGS fit from the previous month's coefficients (faster, not bit-reproducible
+    # against cold fits).
+    warm_start: bool = False
+    # Update imputation medians and scaler stats from each month's new rows instead of refitting them
+    # on the full history (approximate: earlier rows keep the medians they were imputed with).
+    incremental_preprocessing: bool = False
+
+
+class _RunningMedianImputer(TransformerMixin, BaseEstimator):
+    """Median imputer whose per-column medians can be updated from new rows only.
+
+    Observed values are kept in per-column sorted buffers; `partial_fit` merges new values in
+    with a searchsorted insert. Columns with no observations impute 0.0.
+    """
+
+    def partial_fit(self, X, y=None):
+        X = np.asarray(X, dtype=np.float64)
+        if not hasattr(self, "sorted_"):
+            self.sorted_ = [np.empty(0) for _ in range(X.shape[1])]
+        stats = np.zeros(X.shape[1])
+        for j, buf in enumerate(self.sorted_):
+            col = X[:, j]
+            col = np.sort(col[~np.isnan(col)])
+            buf = np.insert(buf, np.searchsorted(buf, col), col)
+            self.sorted_[j] = buf
+            n = len(buf)
+            if n:
+                stats[j] = (buf[(n - 1) // 2] + buf[n // 2]) / 2.0
+        self.statistics_ = stats
+        return self
+
+    def fit(self, X, y=None):
+        self.__dict__.pop("sorted_", None)
+        return self.partial_fit(X, y)
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        rows, cols = np.nonzero(np.isnan(X))
+        X[rows, cols] = self.statistics_[cols]
+        return X
 
 
 def walkforward_logistic_probabilities(
@@ -32,21 +73,33 @@ def walkforward_logistic_probabilities(
     - Trains only on rows with known labels (non-NaN)
     - Predicts probabilities for subsequent period until next retrain date
     """
+    if not X.index.is_monotonic_increasing:
+        X = X.sort_index()
     if not X.index.equals(y.index):
         y = y.reindex(X.index)
 
     idx = X.index
-    probs = pd.Series(index=idx, dtype="float64", name="risk_off_prob")
+    X_arr = X.to_numpy(dtype=np.float64, na_value=np.nan)
+    y_arr = y.to_numpy(dtype=np.float64, na_value=np.nan)
+    y_valid = ~np.isnan(y_arr)
+    probs_arr = np.full(len(idx), np.nan)
 
     retrain_dates = (
         X.resample(cfg.retrain_frequency).last().index  # month ends present in data
     )
-    if len(retrain_dates) == 0:
-        return probs
-
+    if len(retrain_dates) == 0 or not y_valid.any():
+        return pd.Series(probs_arr, index=idx, name="risk_off_prob")
+
+    incremental = bool(cfg.incremental_preprocessing)
+    if incremental:
+        imputer = _RunningMedianImputer()
+    else:
+        # Warm starts need a fixed coefficient shape, so keep (zero-fill) columns that have no
+        # observations yet instead of dropping them.
+        imputer = SimpleImputer(strategy="median", keep_empty_features=bool(cfg.warm_start))
     model = Pipeline(
         steps=[
-            ("imputer", SimpleImputer(strategy="median")),
+            ("imputer", imputer),
             ("scaler", StandardScaler(with_mean=True, with_std=True)),
             (
                 "clf",
@@ -55,43 +108,49 @@ def walkforward_logistic_probabilities(
                     penalty="l2",
                     solver="lbfgs",
                     max_iter=2000,
+                    warm_start=bool(cfg.warm_start),
                 ),
             ),
         ]
     )
 
-    def has_min_history(train_index: pd.DatetimeIndex, train_end: pd.Timestamp) -> bool:
-        if len(train_index) == 0:
-            return False
-        earliest = train_index.min()
-        return earliest <= (train_end - pd.Timedelta(days=int(cfg.min_train_years * 365.25)))
+    # Rows are date-sorted, so every train/predict window is a positional slice.
+    first_label_pos = int(np.argmax(y_valid))
+    min_history = pd.Timedelta(days=int(cfg.min_train_years * 365.25))
+    # Predict window for retrain i: (train_end, next_train_end] -> [ends[i], ends[i + 1])
+    ends = idx.searchsorted(retrain_dates, side="right")
+    ends = np.append(ends, len(idx))
+    seen = 0  # incremental mode: labelled rows before this position are already in the stats
 
     for i, train_end in enumerate(retrain_dates):
-        # Predict window: (train_end, next_train_end]
-        next_end = retrain_dates[i + 1] if i + 1 < len(retrain_dates) else idx.max()
-        predict_mask = (idx > train_end) & (idx <= next_end)
-        if not predict_mask.any():
+        te, pe = int(ends[i]), int(ends[i + 1])
+        if pe <= te:
             continue
 
-        train_mask = (idx <= train_end) & y.notna()
-        train_idx = idx[train_mask]
-        if not has_min_history(train_idx, train_end):
+        # Require min_train_years between the earliest labelled row and train_end.
+        if te <= first_label_pos or idx[first_label_pos] > train_end - min_history:
             continue
 
-        X_train = X.loc[train_mask]
-        y_train = y.loc[train_mask].astype(int)
+        train_rows = y_valid[:te]
+        X_train = X_arr[:te][train_rows]
+        y_train = y_arr[:te][train_rows].astype(np.int8)
 
         # Require both classes present
-        if y_train.nunique(dropna=True) < 2:
+        if y_train.min() == y_train.max():
             continue
 
-        model.fit(X_train.values, y_train.values)
-
-        X_pred = X.loc[predict_mask]
-        p = model.predict_proba(X_pred.values)[:, 1]
-        probs.loc[predict_mask] = p
+        if incremental:
+            new_rows = X_arr[seen:te][y_valid[seen:te]]
+            seen = te
+            # Nothing newly labelled (e.g. the label horizon spans the whole month): keep the stats.
+            if len(new_rows):
+                imputer.partial_fit(new_rows)
+                model.named_steps["scaler"].partial_fit(imputer.transform(new_rows))
+            model.named_steps["clf"].fit(model[:-1].transform(X_train), y_train)
+        else:
+            model.fit(X_train, y_train)
+        probs_arr[te:pe] = model.predict_proba(X_arr[te:pe])[:, 1]
 
     # For convenience, also fill probabilities on retrain_dates themselves using the model
     # from the previous period (if it exists). Leave NaN otherwise.
-    return probs
-
+    return pd.Series(probs_arr, index=idx, name="risk_off_prob")
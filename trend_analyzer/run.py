@@ -1,17 +1,37 @@
 from __future__ import annotations
 
 import argparse
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from .config import AppConfig
-from .data_loader import align_series, load_or_download_series
-from .features import cross_asset_features, equity_features
+from .data_loader import align_series, load_or_download_many, load_or_download_series
+from .features import cross_asset_features, equity_features_batch
 from .indicators import forward_max_drawdown, forward_return
 from .regime_model import RiskModelConfig, walkforward_logistic_probabilities
-from .scoring import assemble_final_score, compute_safe_haven_stretch, compute_score_components
-from .util import ensure_dir
+from .scoring import (
+    assemble_final_score,
+    compute_safe_haven_stretch,
+    compute_score_components,
+    safe_haven_score_labels,
+)
+from .util import ensure_dir, write_table
+
+# Divergence labels; "unknown" fills dates outside the cross-asset index.
+_DIVERGENCE_STATES = [
+    "normal",
+    "riskoff_crash_day",
+    "riskoff_selloff",
+    "riskoff_bear_bounce",
+    "divergence_trendup_riskoff",
+    "riskoff_downtrend",
+    "selloff_without_riskoff",
+    "unknown",
+]
 
 
 def _as_candidates(v) -> list[str]:
@@ -33,6 +53,7 @@ def _try_load_candidates(
     end: str | None,
     refresh: bool,
     required: bool = False,
+    prefetched: Mapping[str, pd.Series | None] | None = None,
 ) -> pd.Series | None:
     if not candidates:
         if required:
@@ -41,13 +62,21 @@ def _try_load_candidates(
     last_err: Exception | None = None
     for t in candidates:
         try:
-            s = load_or_download_series(
-                ticker=t,
-                cache_dir=cache_dir,
-                start=start,
-                end=end,
-                refresh=refresh,
-            ).rename(name)
+            if prefetched is not None and t in prefetched:
+                # Already attempted by the batched prefetch; None means it returned nothing.
+                s = prefetched[t]
+                if s is None:
+                    last_err = RuntimeError(f"'{t}' was not returned by the batched download")
+                    continue
+                s = s.rename(name)
+            else:
+                s = load_or_download_series(
+                    ticker=t,
+                    cache_dir=cache_dir,
+                    start=start,
+                    end=end,
+                    refresh=refresh,
+                ).rename(name)
             if s is not None and not s.dropna().empty:
                 return s
         except Exception as e:  # noqa: BLE001 - CLI tool, best-effort fallbacks
@@ -59,6 +88,43 @@ def _try_load_candidates(
     return None
 
 
+def _prefetch_first_candidates(
+    tickers: list[str],
+    *,
+    cache_dir: Path,
+    start: str | None,
+    end: str | None,
+    refresh: bool,
+) -> dict[str, pd.Series | None] | None:
+    """Load every ticker with one batched download; None if the batch itself fails."""
+    try:
+        loaded = load_or_download_many(tickers, cache_dir=cache_dir, start=start, end=end, refresh=refresh)
+    except Exception as e:  # noqa: BLE001 - fall back to per-ticker loads
+        print(f"Warning: batched prefetch failed ({e}). Loading series one by one.")
+        return None
+    return {t: loaded.get(t) for t in tickers}
+
+
+def _stack_scores(frames: Mapping[str, pd.DataFrame]) -> pd.DataFrame:
+    """Stack per-index score frames (with a ``date`` column) column by column, sorted by (date, index)."""
+    parts = list(frames.values())
+    rank = {name: r for r, name in enumerate(sorted(frames))}
+    key = np.repeat([rank[name] for name in frames], [len(df) for df in parts])
+    dates = np.concatenate([df["date"].to_numpy() for df in parts])
+    order = np.lexsort((key, dates))
+
+    cols: dict[str, object] = {}
+    for c in parts[0].columns:
+        col_parts = [df[c] for df in parts]
+        dtypes = {s.dtype for s in col_parts}
+        if len(dtypes) == 1 and isinstance(next(iter(dtypes)), np.dtype):
+            cols[c] = np.concatenate([s.to_numpy() for s in col_parts])[order]
+        else:
+            # Extension dtypes (categorical labels, strings) keep their pandas concat semantics.
+            cols[c] = pd.concat(col_parts, ignore_index=True).array.take(order)
+    return pd.DataFrame(cols)
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Trend Analyzer (Nifty) - local runner")
     parser.add_argument("--config", default="config.yaml", help="Path to config.yaml")
@@ -77,79 +143,44 @@ def main(argv: list[str] | None = None) -> int:
     risk = cfg.get("tickers", "risk_off", default={}) or {}
     yields = cfg.get("tickers", "yields", default={}) or {}
 
-    series_map: dict[str, pd.Series] = {}
-    # Equities (allow list of fallback tickers)
-    s = _try_load_candidates(
-        name="eq_nifty50",
-        candidates=_as_candidates(eq.get("nifty50")),
+    # (logical name, candidates, required). Equities allow a list of fallback tickers.
+    specs: list[tuple[str, list[str], bool]] = [("eq_nifty50", _as_candidates(eq.get("nifty50")), True)]
+    specs += [(f"eq_{key}", _as_candidates(eq.get(key)), False) for key in ["midcap100", "smallcap100"]]
+    # Risk-off assets (single tickers)
+    specs += [(f"ro_{k}", _as_candidates(v), False) for k, v in risk.items()]
+    # Yields (US)
+    specs += [(f"y_{k}", _as_candidates(yields.get(k)), False) for k in ["us10y", "us3m"]]
+    # Best-effort India 10Y yield selection (no-auth sources can be unreliable).
+    specs.append(("y_india10y", _as_candidates(yields.get("india10y_candidates")), False))
+
+    # First-choice tickers share one download; fallback candidates are loaded one at a time.
+    prefetched = _prefetch_first_candidates(
+        list(dict.fromkeys(cands[0] for _, cands, _ in specs if cands)),
         cache_dir=cache_dir,
         start=start,
         end=end,
         refresh=args.refresh,
-        required=True,
     )
-    if s is not None:
-        series_map["eq_nifty50"] = s
-
-    for key in ["midcap100", "smallcap100"]:
-        s = _try_load_candidates(
-            name=f"eq_{key}",
-            candidates=_as_candidates(eq.get(key)),
-            cache_dir=cache_dir,
-            start=start,
-            end=end,
-            refresh=args.refresh,
-            required=False,
-        )
-        if s is not None:
-            series_map[f"eq_{key}"] = s
-
-    # Risk-off assets (single tickers)
-    for k, v in risk.items():
-        s = _try_load_candidates(
-            name=f"ro_{k}",
-            candidates=_as_candidates(v),
-            cache_dir=cache_dir,
-            start=start,
-            end=end,
-            refresh=args.refresh,
-            required=False,
-        )
-        if s is not None:
-            series_map[f"ro_{k}"] = s
 
-    # Yields (US)
-    for k in ["us10y", "us3m"]:
+    series_map: dict[str, pd.Series] = {}
+    for name, cands, required in specs:
         s = _try_load_candidates(
-            name=f"y_{k}",
-            candidates=_as_candidates(yields.get(k)),
+            name=name,
+            candidates=cands,
             cache_dir=cache_dir,
             start=start,
             end=end,
             refresh=args.refresh,
-            required=False,
+            required=required,
+            prefetched=prefetched,
         )
         if s is not None:
-            series_map[f"y_{k}"] = s
+            series_map[name] = s
 
-    # Best-effort India 10Y yield selection (no-auth sources can be unreliable).
-    india10y_candidates = _as_candidates(yields.get("india10y_candidates"))
-    india_bond_proxy = yields.get("india_bond_proxy")
-    s = _try_load_candidates(
-        name="y_india10y",
-        candidates=india10y_candidates,
-        cache_dir=cache_dir,
-        start=start,
-        end=end,
-        refresh=args.refresh,
-        required=False,
-    )
-    if s is not None:
-        series_map["y_india10y"] = s
-    else:
+    if "y_india10y" not in series_map:
         s = _try_load_candidates(
             name="y_india_bond_proxy",
-            candidates=_as_candidates(india_bond_proxy),
+            candidates=_as_candidates(yields.get("india_bond_proxy")),
             cache_dir=cache_dir,
             start=start,
             end=end,
@@ -162,7 +193,9 @@ def main(argv: list[str] | None = None) -> int:
     aligned = align_series(series_map, max_forward_fill_days=max_ff)
 
     out_dir = ensure_dir(args.out_dir)
-    (out_dir / "aligned_prices.csv").write_text(aligned.to_csv(index=True), encoding="utf-8")
+    out_cfg = cfg.get("output", default={}) or {}
+    out_fmt = str(out_cfg.get("format", "csv")).lower()
+    aligned_path = write_table(aligned, out_dir / "aligned_prices", fmt=out_fmt, index=True)
 
     # --- Safe-haven per-asset scoring (shared, mean-reversion stretch) ---
     safe_cfg = cfg.get("safe_haven", default={}) or {}
@@ -202,12 +235,8 @@ def main(argv: list[str] | None = None) -> int:
     if safe_enabled and safe_basket_enabled and safe_scores:
         tmp = pd.DataFrame(safe_scores)
         safe_basket_score = tmp.mean(axis=1)
-        # Use same labeling function logic as safe_haven_score_to_label via compute_safe_haven_stretch labels:
-        # reuse the mapping by computing from score values.
-        safe_basket_label = safe_basket_score.apply(
-            lambda x: "insufficient_data" if pd.isna(x)
-            else ("oversold" if x < 20 else "weak" if x < 40 else "neutral" if x < 60 else "strong" if x < 80 else "overbought")
-        )
+        # Same buckets as the per-asset safe-haven labels.
+        safe_basket_label = safe_haven_score_labels(safe_basket_score)
 
     # --- Feature config ---
     feat_cfg = cfg.get("features", default={}) or {}
@@ -226,14 +255,10 @@ def main(argv: list[str] | None = None) -> int:
     # Midcap and Smallcap use the same reduced z_window (160) for consistency.
     min_history_for_full_z = ema_slow + 60 + z_window  # 200 + 60 + 252 = 512
     eq_prices = {
-        "nifty50": aligned.get("eq_nifty50"),
-        "midcap100": aligned.get("eq_midcap100"),
-        "smallcap100": aligned.get("eq_smallcap100"),
+        k: aligned[f"eq_{k}"] for k in ["nifty50", "midcap100", "smallcap100"] if f"eq_{k}" in aligned.columns
     }
-    eq_feats: dict[str, pd.DataFrame] = {}
+    z_effective_by_index: dict[str, int] = {}
     for k, s in eq_prices.items():
-        if s is None:
-            continue
         valid_count = int(s.dropna().shape[0])
         # Nifty uses full z_window; midcap and smallcap use reduced window (160) for consistency
         if k == "nifty50":
@@ -248,16 +273,19 @@ def main(argv: list[str] | None = None) -> int:
             else:
                 # Even if history is sufficient, use reduced window for midcap/smallcap
                 z_effective = 160
-        eq_feats[k] = equity_features(
-            s,
-            ema_fast=ema_fast,
-            ema_slow=ema_slow,
-            rsi=rsi,
-            dd_window=dd_window,
-            vol_windows=vol_windows,
-            z_window=z_effective,
-            price_z_window=price_z_window,
-        )
+        z_effective_by_index[k] = z_effective
+
+    # Indices are independent; the feature kernel releases the GIL so they run in parallel.
+    eq_feats = equity_features_batch(
+        eq_prices,
+        ema_fast=ema_fast,
+        ema_slow=ema_slow,
+        rsi=rsi,
+        dd_window=dd_window,
+        vol_windows=vol_windows,
+        z_window=z_effective_by_index,
+        price_z_window=price_z_window,
+    )
 
     # --- Cross-asset features (shared) ---
     xasset = cross_asset_features(aligned, z_window=z_window)
@@ -271,12 +299,20 @@ def main(argv: list[str] | None = None) -> int:
         min_train_years=int(rm_cfg_raw.get("min_train_years", 5)),
         retrain_frequency=str(rm_cfg_raw.get("retrain_frequency", "M")),
         regularization_C=float(rm_cfg_raw.get("regularization_C", 1.0)),
+        warm_start=bool(rm_cfg_raw.get("warm_start", False)),
+        incremental_preprocessing=bool(rm_cfg_raw.get("incremental_preprocessing", False)),
     )
 
     nifty_feat = eq_feats.get("nifty50")
     if nifty_feat is None:
         raise RuntimeError("Missing Nifty 50 data; cannot train risk regime model.")
 
+    # Nifty trending up (positive EMA slope and ratio z); shared by the model interaction and divergence states.
+    nifty_trend_up = pd.Series(
+        (nifty_feat["ema_slope_z"].to_numpy() > 0) & (nifty_feat["ema_ratio_z"].to_numpy() > 0),
+        index=nifty_feat.index,
+    )
+
     # Label definition
     nifty_px = nifty_feat["px"]
     fwd_ret = forward_return(nifty_px, horizon_days=rm_cfg.horizon_days)
@@ -303,12 +339,18 @@ def main(argv: list[str] | None = None) -> int:
         ],
         axis=1,
     )
-    model_X = model_X.replace([pd.NA, pd.NaT], float("nan")).dropna(how="all")
+    # Every input column is float (NaN-based), so there are no pd.NA/NaT sentinels to normalize.
+    # Keep the first of any duplicated column name so selections stay 1-D.
+    model_X = model_X.loc[:, ~model_X.columns.duplicated()].dropna(how="all")
 
     # Extra explicit divergence interaction: equities trending up while risk-off composite rises.
     if "riskoff_composite" in model_X.columns:
-        trend_up = ((nifty_feat["ema_slope_z"] > 0) & (nifty_feat["ema_ratio_z"] > 0)).astype("float64")
-        model_X["divergence_equity_up_riskoff"] = trend_up.reindex(model_X.index) * model_X["riskoff_composite"]
+        trend_up = nifty_trend_up.astype("float64").reindex(model_X.index)
+        model_X["divergence_equity_up_riskoff"] = trend_up * model_X["riskoff_composite"]
+
+    # Series that never loaded carry no signal (the imputer would drop or zero-fill them anyway).
+    # float32 storage halves the table; the model upcasts to float64 for fitting.
+    model_X = model_X.dropna(axis=1, how="all").astype(np.float32)
 
     y = risk_off.reindex(model_X.index)
     probs = walkforward_logistic_probabilities(X=model_X, y=y, cfg=rm_cfg)
@@ -321,58 +363,71 @@ def main(argv: list[str] | None = None) -> int:
     impulse_adj_max = float(sc_cfg.get("impulse_adj_max", 20.0))
     neutral_shift = float(sc_cfg.get("neutral_shift", 20.0))
 
-    scores_long: list[pd.DataFrame] = []
-
     # Divergence outputs (more granular, for transparency)
     riskoff_comp = xasset.get("riskoff_composite")
     if riskoff_comp is not None:
-        nifty_trend_up = (nifty_feat["ema_slope_z"] > 0) & (nifty_feat["ema_ratio_z"] > 0)
+        idx = riskoff_comp.index
+        trend_up = nifty_trend_up.reindex(idx, fill_value=False).to_numpy(dtype=bool)
+        ro = riskoff_comp.to_numpy(dtype=np.float64, na_value=np.nan)
 
         # Short-term direction filters so we don't label a down day as a "divergence".
         # Use log-return vs recent daily sigma (vol20 is annualized).
-        lr1 = nifty_feat["lr"].reindex(riskoff_comp.index)
-        daily_sigma = (nifty_feat["vol20"] / (252.0 ** 0.5)).reindex(riskoff_comp.index)
+        lr1 = nifty_feat["lr"].reindex(idx).to_numpy(dtype=np.float64, na_value=np.nan)
+        daily_sigma = (nifty_feat["vol20"] / (252.0 ** 0.5)).reindex(idx).to_numpy(dtype=np.float64, na_value=np.nan)
         equity_down = lr1 < 0
         equity_up = lr1 > 0
         heavy_down = (lr1 < (-2.0 * daily_sigma)) | (lr1 < -0.02)
 
-        riskoff_high = riskoff_comp > 0.75
-        riskoff_low = riskoff_comp < -0.75
+        riskoff_high = ro > 0.75
+        riskoff_low = ro < -0.75
 
         # Bear-market bounce detector:
         # risk-off composite stays high, but equities bounce after a big down day.
-        lr_prev = lr1.shift(1)
-        sigma_prev = daily_sigma.shift(1)
-        prev_heavy_down = (lr_prev < (-2.0 * sigma_prev)) | (lr_prev < -0.02)
+        prev_heavy_down = np.zeros_like(heavy_down)
+        prev_heavy_down[1:] = heavy_down[:-1]
 
-        # Categorical divergence state
-        divergence_state = pd.Series("normal", index=riskoff_comp.index, dtype="object")
         # Priority order (more specific first):
         mask_crash_day = riskoff_high & equity_down & heavy_down
-        mask_selloff = riskoff_high & equity_down & (~heavy_down)
+        mask_selloff = riskoff_high & equity_down & ~heavy_down
         mask_bear_bounce = riskoff_high & equity_up & prev_heavy_down
-
-        trend_up = nifty_trend_up.reindex(riskoff_comp.index)
         # True divergence = risk-off high while not down today, trend-up, and NOT just a bounce after a heavy down day.
-        mask_divergence = riskoff_high & (~equity_down) & trend_up & (~mask_bear_bounce)
-        mask_downtrend = riskoff_high & (~equity_down) & (~trend_up) & (~mask_bear_bounce)
-
+        not_down = riskoff_high & ~equity_down & ~mask_bear_bounce
+        mask_divergence = not_down & trend_up
+        mask_downtrend = not_down & ~trend_up
         mask_selloff_without_riskoff = riskoff_low & heavy_down
 
-        divergence_state[mask_crash_day] = "riskoff_crash_day"
-        divergence_state[mask_selloff] = "riskoff_selloff"
-        divergence_state[mask_bear_bounce] = "riskoff_bear_bounce"
-        divergence_state[mask_divergence] = "divergence_trendup_riskoff"
-        divergence_state[mask_downtrend] = "riskoff_downtrend"
-        divergence_state[mask_selloff_without_riskoff] = "selloff_without_riskoff"
+        # Categorical divergence state; later masks in the priority list win, so select in reverse.
+        codes = np.select(
+            [
+                mask_selloff_without_riskoff,
+                mask_downtrend,
+                mask_divergence,
+                mask_bear_bounce,
+                mask_selloff,
+                mask_crash_day,
+            ],
+            [6, 5, 4, 3, 2, 1],
+            default=0,
+        ).astype(np.int8)
+        divergence_state = pd.Series(
+            pd.Categorical.from_codes(codes, categories=_DIVERGENCE_STATES),
+            index=idx,
+        )
 
         # Keep a boolean flag for the specific divergence case only:
-        divergence_flag = divergence_state.eq("divergence_trendup_riskoff")
+        divergence_flag = pd.Series(codes == _DIVERGENCE_STATES.index("divergence_trendup_riskoff"), index=idx)
     else:
         divergence_flag = None
         divergence_state = None
 
-    for name, f in eq_feats.items():
+    # Indices are scored independently (the kernels release the GIL), so run them on a thread pool.
+    def _score_index(name: str, f: pd.DataFrame) -> pd.DataFrame:
+        # Align the shared regime/divergence context to this index once; columns attach as arrays.
+        target_idx = f.index
+        roc_aligned = None
+        if riskoff_comp is not None:
+            roc_aligned = riskoff_comp.reindex(target_idx).to_numpy(dtype=np.float64, na_value=np.nan)
+
         comps = compute_score_components(
             f,
             trend_score_max=trend_score_max,
@@ -382,17 +437,17 @@ def main(argv: list[str] | None = None) -> int:
         scored = assemble_final_score(
             components=comps,
             risk_off_prob=probs,
-            riskoff_composite=riskoff_comp if riskoff_comp is not None else None,
+            riskoff_composite=roc_aligned,
             risk_penalty_max=risk_penalty_max,
             neutral_shift=neutral_shift,
         )
         # Attach key regime/divergence context to each row (same for all indices).
-        if riskoff_comp is not None:
-            scored["riskoff_composite"] = riskoff_comp.reindex(scored.index)
+        if roc_aligned is not None:
+            scored["riskoff_composite"] = roc_aligned
         if divergence_state is not None:
-            scored["divergence_state"] = divergence_state.reindex(scored.index).fillna("unknown")
+            scored["divergence_state"] = divergence_state.reindex(target_idx, fill_value="unknown").array
         if divergence_flag is not None:
-            scored["divergence_flag"] = divergence_flag.reindex(scored.index).fillna(False)
+            scored["divergence_flag"] = divergence_flag.reindex(target_idx, fill_value=False).to_numpy()
         else:
             scored["divergence_flag"] = False
 
@@ -425,21 +480,23 @@ def main(argv: list[str] | None = None) -> int:
         ]
         extra_cols = [c for c in scored.columns if c not in base_cols]
         scored = scored[base_cols + extra_cols]
-        scores_long.append(scored.reset_index(names="date"))
+        return scored.reset_index(names="date")
+
+    names = list(eq_feats.keys())
+    with ThreadPoolExecutor(max_workers=len(names) or None) as pool:
+        scores_by_index = dict(zip(names, pool.map(_score_index, names, eq_feats.values())))
 
-    scores = pd.concat(scores_long, ignore_index=True).sort_values(["date", "index"])
-    scores_path = out_dir / "scores.csv"
-    scores.to_csv(scores_path, index=False)
+    scores = _stack_scores(scores_by_index)
+    scores_path = write_table(scores, out_dir / "scores", fmt=out_fmt, index=False)
 
     # Optionally write per-index features
-    out_cfg = cfg.get("output", default={}) or {}
     if bool(out_cfg.get("write_features", False)):
         for name, f in eq_feats.items():
-            f.to_csv(out_dir / f"features_{name}.csv", index=True)
-        xasset.to_csv(out_dir / "features_cross_asset.csv", index=True)
-        model_X.to_csv(out_dir / "features_model_X.csv", index=True)
+            write_table(f, out_dir / f"features_{name}", fmt=out_fmt, index=True)
+        write_table(xasset, out_dir / "features_cross_asset", fmt=out_fmt, index=True)
+        write_table(model_X, out_dir / "features_model_X", fmt=out_fmt, index=True)
 
-    print(f"Wrote {out_dir / 'aligned_prices.csv'} ({aligned.shape[0]} rows, {aligned.shape[1]} cols)")
+    print(f"Wrote {aligned_path} ({aligned.shape[0]} rows, {aligned.shape[1]} cols)")
     print(f"Wrote {scores_path} ({scores.shape[0]} rows)")
 
     return 0
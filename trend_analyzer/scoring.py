@@ -3,7 +3,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-from .indicators import clamp, rsi_wilder, zscore
+from . import _kernels
+from .indicators import rsi_wilder, zscore
 
 
 def score_to_label(score: float) -> str:
@@ -31,6 +32,36 @@ def safe_haven_score_to_label(score: float) -> str:
     return "overbought"
 
 
+# Bucket edges shared by both label sets: [<20, <40, <60, <80, >=80].
+_LABEL_BINS = np.array([20.0, 40.0, 60.0, 80.0])
+_SCORE_LABELS = [
+    "oversold_panic",
+    "bearish_below_trend",
+    "neutral_fair_vs_trend",
+    "bullish_overboughtish",
+    "euphoric_very_overbought",
+]
+_SAFE_HAVEN_LABELS = ["oversold", "weak", "neutral", "strong", "overbought"]
+
+
+def _bucket_labels(vals: np.ndarray, labels: list[str]) -> pd.Categorical:
+    codes = np.searchsorted(_LABEL_BINS, vals, side="right")
+    codes[np.isnan(vals)] = len(labels)
+    return pd.Categorical.from_codes(codes, categories=[*labels, "insufficient_data"])
+
+
+def score_labels(score: pd.Series) -> pd.Series:
+    """Vectorized `score_to_label` (NaN -> "insufficient_data"), as a categorical Series."""
+    vals = score.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(_bucket_labels(vals, _SCORE_LABELS), index=score.index)
+
+
+def safe_haven_score_labels(score: pd.Series) -> pd.Series:
+    """Vectorized `safe_haven_score_to_label` (NaN -> "insufficient_data"), as a categorical Series."""
+    vals = score.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(_bucket_labels(vals, _SAFE_HAVEN_LABELS), index=score.index)
+
+
 def compute_safe_haven_stretch(
     price: pd.Series,
     *,
@@ -52,32 +83,34 @@ def compute_safe_haven_stretch(
 
     z1, z2 = z_windows
     # Use log-price for z-scores to better reflect long-run multiplicative drift.
-    log_px = np.log(px.replace(0.0, np.nan))
+    px_arr = px.to_numpy()
+    log_px = pd.Series(np.log(np.where(px_arr == 0.0, np.nan, px_arr)), index=px.index)
     out["price_z_short"] = zscore(log_px, window=int(z1))
     out["price_z_long"] = zscore(log_px, window=int(z2))
 
-    # Normalize to roughly [-1, +1]
-    rsi_unit = ((out["rsi"] - 50.0) / 50.0).clip(-1.0, 1.0)
-    z_short_unit = (out["price_z_short"] / 3.0).clip(-1.0, 1.0)
-    z_long_unit = (out["price_z_long"] / 3.0).clip(-1.0, 1.0)
+    # Normalize to roughly [-1, +1]; NaN-preserving, one column per component.
+    units = np.column_stack(
+        [
+            np.clip((out["rsi"].to_numpy() - 50.0) / 50.0, -1.0, 1.0),
+            np.clip(out["price_z_short"].to_numpy() / 3.0, -1.0, 1.0),
+            np.clip(out["price_z_long"].to_numpy() / 3.0, -1.0, 1.0),
+        ]
+    )
 
-    w_rsi, w_zs, w_zl = weights
     # Weighted average but allow missing components (e.g., long-window z early in history).
-    units = pd.concat([rsi_unit.rename("rsi"), z_short_unit.rename("z_short"), z_long_unit.rename("z_long")], axis=1)
-    w = np.array([w_rsi, w_zs, w_zl], dtype="float64")
-    valid_w = units.notna().astype("float64").mul(w, axis=1)
-    denom = valid_w.sum(axis=1)
-    stretch = (units.fillna(0.0).mul(w, axis=1)).sum(axis=1) / denom.replace(0.0, np.nan)
+    w = np.asarray(weights, dtype="float64")
+    valid = ~np.isnan(units)
+    num = np.where(valid, units, 0.0) @ w
+    denom = valid @ w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stretch = np.where(denom > 0.0, num / denom, np.nan)
 
     # Map to 0..100
     # Linear mapping makes 'overbought' reachable for strong multi-signal stretches.
-    score = ((stretch + 1.0) / 2.0) * 100.0
-    score = clamp(score, 0.0, 100.0)
+    score = np.clip((stretch + 1.0) / 2.0 * 100.0, 0.0, 100.0)
 
     out["safe_score"] = score
-    out["safe_label"] = out["safe_score"].apply(
-        lambda x: safe_haven_score_to_label(float(x)) if pd.notna(x) else "insufficient_data"
-    )
+    out["safe_label"] = safe_haven_score_labels(out["safe_score"])
     return out
 
 
@@ -92,94 +125,81 @@ def compute_score_components(
     Build TrendScore (0..trend_score_max) and ReversionAdjustment (-reversion_adj_max..+reversion_adj_max)
     from per-index equity features. Uses bounded transforms to keep outputs stable.
     """
-    f = equity_feat.copy()
-
-    # --- TrendScore ---
-    # Raw trend is a mix of z-scored EMA slope and EMA ratio, plus being above/below EMA200 (d200_z),
-    # and penalize large drawdown.
-    # Add a medium-term momentum term to react faster after sharp regime changes.
-    trend_raw = (
-        0.35 * f["ema_slope_z"]
-        + 0.20 * f["ema_ratio_z"]
-        + 0.15 * f["d200_z"]
-        - 0.15 * f["dd_z"]
-        + 0.15 * f["mom20_z"]
+    cols = [
+        "ema_slope_z",
+        "ema_ratio_z",
+        "d200_z",
+        "dd_z",
+        "mom20_z",
+        "rsi",
+        "price_z",
+        "mom5_vs_sigma_z",
+    ]
+    # Features are stored as float32 (see `equity_features`); the kernel accumulates in float64.
+    arrs = [equity_feat[c].to_numpy(dtype=np.float32, na_value=np.nan) for c in cols]
+
+    # TrendScore: tanh of a mix of z-scored EMA slope/ratio, distance to EMA200, drawdown and
+    # medium-term momentum, mapped to [0, trend_score_max].
+    # ReversionAdjustment: RSI and price_z mapped to [-1, +1]; overbought reduces the score.
+    # ImpulseAdjustment: tanh of fast/medium momentum, for fast selloffs and fast buying.
+    mat = _kernels.score_components(
+        *arrs,
+        float(trend_score_max),
+        float(reversion_adj_max),
+        float(impulse_adj_max),
     )
-    # Map via tanh to [0, trend_score_max]
-    trend_unit = (np.tanh(trend_raw / 2.0) + 1.0) / 2.0
-    trend_score = trend_unit * float(trend_score_max)
-
-    # --- ReversionAdjustment ---
-    # RSI: (0..100) -> (-1..+1) around 50, but invert: high RSI reduces score.
-    rsi_unit = ((f["rsi"] - 50.0) / 50.0).clip(-1.0, 1.0)
-    # price_z: high -> overbought -> reduce score
-    pz_unit = (f["price_z"] / 3.0).clip(-1.0, 1.0)
-    reversion_raw = 0.6 * rsi_unit + 0.4 * pz_unit
-    reversion_adj = -reversion_raw * float(reversion_adj_max)
-
-    # --- ImpulseAdjustment (fast selloff / fast buying sensitivity) ---
-    impulse_raw = 0.6 * f["mom5_vs_sigma_z"] + 0.4 * f["mom20_z"]
-    impulse_unit = np.tanh(impulse_raw / 2.0)  # [-1, +1]
-    impulse_adj = impulse_unit * float(impulse_adj_max)
-
-    out = pd.DataFrame(index=f.index)
-    out["trend_score"] = trend_score
-    out["reversion_adj"] = reversion_adj
-    out["impulse_adj"] = impulse_adj
-    out["rsi_unit"] = rsi_unit
-    out["pricez_unit"] = pz_unit
-    out["trend_raw"] = trend_raw
-    out["impulse_raw"] = impulse_raw
-    return out
+    names = ["trend_score", "reversion_adj", "impulse_adj", "rsi_unit", "pricez_unit", "trend_raw", "impulse_raw"]
+    # The kernel output is freshly allocated, so the frame can own it without a copy.
+    return pd.DataFrame(mat.T, index=equity_feat.index, columns=names, copy=False)
 
 
 def assemble_final_score(
     *,
     components: pd.DataFrame,
     risk_off_prob: pd.Series,
-    riskoff_composite: pd.Series | None = None,
+    riskoff_composite: pd.Series | np.ndarray | None = None,
     risk_penalty_max: float,
     neutral_shift: float,
 ) -> pd.DataFrame:
-    p = risk_off_prob.reindex(components.index)
-    # If the regime model isn't available yet (insufficient history),
-    # treat it as "no extra penalty" but keep the probability column as-is.
-    p_for_penalty = p.fillna(0.0)
-    risk_penalty = p_for_penalty * float(risk_penalty_max)
-
-    # Risk context used to dampen "oversold bounce" effects during strong risk-off backdrops.
-    # This makes March-like crash regimes read more bearish, while allowing April rebounds
-    # to recover faster once risk-off composite eases.
-    risk_context = p_for_penalty.copy()
-    if riskoff_composite is not None:
-        roc = riskoff_composite.reindex(components.index)
-        # Map roughly: <=0.25 -> 0, >=1.25 -> 1
-        rc2 = ((roc - 0.25) / 1.0).clip(lower=0.0, upper=1.0).fillna(0.0)
-        risk_context = np.maximum(risk_context, rc2)
-
-    # Damp positive (bullish) adjustments when risk context is high.
-    rev = components["reversion_adj"]
-    rev_eff = rev.clip(lower=0.0) * (1.0 - 0.70 * risk_context) + rev.clip(upper=0.0)
-
-    imp = components["impulse_adj"]
-    imp_eff = imp.clip(lower=0.0) * (1.0 - 0.50 * risk_context) + imp.clip(upper=0.0)
-
-    score = (
-        components["trend_score"]
-        + float(neutral_shift)
-        + rev_eff
-        + imp_eff
-        - risk_penalty
+    """Combine score components with the regime context into the final 0..100 score and label.
+
+    ``riskoff_composite`` may be passed as an ndarray already aligned to ``components.index``.
+    """
+    idx = components.index
+    p = risk_off_prob.reindex(idx).to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    if riskoff_composite is None:
+        roc = np.empty(0)
+    elif isinstance(riskoff_composite, np.ndarray):
+        roc = riskoff_composite.astype(np.float64, copy=False)
+        # The kernel indexes roc by row without bounds checks.
+        if roc.shape != (len(idx),):
+            raise ValueError(
+                f"riskoff_composite array has shape {roc.shape}; expected ({len(idx)},) to match components."
+            )
+    else:
+        roc = riskoff_composite.reindex(idx).to_numpy(dtype=np.float64, na_value=np.nan)
+    # The output frame owns its arrays: inputs are copied (as `components.copy()` did), kernel outputs are fresh.
+    cols = {c: components[c].to_numpy(copy=True) for c in components.columns}
+
+    # A missing regime probability (insufficient history) means "no extra penalty".
+    # Risk context (max of the probability and the risk-off composite mapped <=0.25 -> 0, >=1.25 -> 1)
+    # damps bullish reversion/impulse adjustments, so crash regimes read more bearish while
+    # rebounds recover once the composite eases.
+    risk_penalty, risk_context, rev_eff, imp_eff, score = _kernels.final_score(
+        cols["trend_score"].astype(np.float64),
+        cols["reversion_adj"].astype(np.float64),
+        cols["impulse_adj"].astype(np.float64),
+        p,
+        roc,
+        float(risk_penalty_max),
+        float(neutral_shift),
     )
-    score = clamp(score, 0.0, 100.0)
-
-    out = components.copy()
-    out["risk_off_prob"] = p
-    out["risk_context"] = risk_context
-    out["reversion_adj_eff"] = rev_eff
-    out["impulse_adj_eff"] = imp_eff
-    out["risk_penalty"] = risk_penalty
-    out["score"] = score
-    out["label"] = score.apply(lambda x: score_to_label(float(x)) if pd.notna(x) else "insufficient_data")
-    return out
 
+    cols["risk_off_prob"] = p
+    cols["risk_context"] = risk_context
+    cols["reversion_adj_eff"] = rev_eff
+    cols["impulse_adj_eff"] = imp_eff
+    cols["risk_penalty"] = risk_penalty
+    cols["score"] = score
+    cols["label"] = _bucket_labels(score, _SCORE_LABELS)
+    return pd.DataFrame(cols, index=idx, copy=False)
@@ -3,15 +3,33 @@ from __future__ import annotations
 import re
 from pathlib import Path
 
+import pandas as pd
+
+# Keep alnum, dash, underscore; convert everything else to underscore
+_SAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
 
 def safe_filename(name: str) -> str:
-    # Keep alnum, dash, underscore; convert everything else to underscore
-    s = re.sub(r"[^A-Za-z0-9_-]+", "_", name.strip())
+    s = _SAFE_RE.sub("_", name.strip())
     return s or "file"
 
 
 def ensure_dir(path: str | Path) -> Path:
     p = Path(path)
-    p.mkdir(parents=True, exist_ok=True)
+    if not p.is_dir():
+        p.mkdir(parents=True, exist_ok=True)
     return p
 
+
+def write_table(df: pd.DataFrame, path_noext: str | Path, *, fmt: str = "csv", index: bool = True) -> Path:
+    """Write ``df`` as ``<path_noext>.csv`` or ``<path_noext>.parquet`` (zstd) and return the path."""
+    p = Path(path_noext)
+    if fmt == "csv":
+        out = p.with_name(p.name + ".csv")
+        df.to_csv(out, index=index, lineterminator="\n")
+    elif fmt == "parquet":
+        out = p.with_name(p.name + ".parquet")
+        df.to_parquet(out, engine="pyarrow", compression="zstd", index=index)
+    else:
+        raise ValueError(f"Unsupported output format {fmt!r}; expected 'csv' or 'parquet'.")
+    return out